@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.core.signals import request_started
+
+        import api.signals  # noqa: F401
+        from foodgram_backend.db import close_unusable_connections
+
+        request_started.connect(close_unusable_connections)
+
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from api.diagnostics import add_slow_query_log, profiler
+
+        if settings.SLOW_QUERY_MS:
+            connection_created.connect(add_slow_query_log)
+        if settings.PROFILER_SAMPLE_RATE:
+            profiler.install()
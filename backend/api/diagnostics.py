@@ -0,0 +1,188 @@
+import logging
+import os
+import random
+import re
+import signal
+import sys
+import threading
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_diagnostics', default=None)
+
+
+class RequestDiagnostics:
+    """Диагностика одного запроса: имя вьюхи для журнала медленных
+    запросов и выборки стеков, если запрос попал в профилирование."""
+
+    def __init__(self, request, sampled):
+        self.request = request
+        self.sampled = sampled
+        self.samples = Counter()
+
+    @property
+    def endpoint(self):
+        resolver_match = getattr(self.request, 'resolver_match', None)
+        return resolver_match.view_name if resolver_match else None
+
+
+def get_current_diagnostics():
+    return _current.get()
+
+
+@contextmanager
+def diagnose_request(request):
+    """Начинает диагностику запроса и решает, профилировать ли его:
+    в профилирование попадает доля PROFILER_SAMPLE_RATE запросов."""
+    diagnostics = RequestDiagnostics(
+        request,
+        sampled=profiler.installed
+        and random.random() < settings.PROFILER_SAMPLE_RATE
+    )
+    token = _current.set(diagnostics)
+    try:
+        yield diagnostics
+    finally:
+        _current.reset(token)
+        if diagnostics.samples:
+            profiler.dump(diagnostics.endpoint, diagnostics.samples)
+
+
+def stack_summary(limit=5):
+    """Последние вызовы кода проекта, без Django и других библиотек."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-1]
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return ' <- '.join(
+        f'{os.path.relpath(frame.filename, base_dir)}:{frame.lineno} '
+        f'{frame.name}'
+        for frame in reversed(frames[-limit:])
+    )
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """Обертка выполнения SQL: запросы дольше SLOW_QUERY_MS
+    записываются в журнал с именем вьюхи и местом вызова."""
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (perf_counter() - start) * 1000
+        if duration >= settings.SLOW_QUERY_MS:
+            diagnostics = get_current_diagnostics()
+            logger.warning(
+                'Медленный SQL-запрос %.1f мс, %s, %s: %s',
+                duration,
+                diagnostics and diagnostics.endpoint or '-',
+                stack_summary() or '-',
+                sql,
+            )
+
+
+def add_slow_query_log(sender, connection, **kwargs):
+    """Подключает журнал медленных запросов к новому соединению."""
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
+
+
+def collapse_stack(frame):
+    """Стек в формате collapsed stacks для flamegraph:
+    вызовы от корня к листу через точку с запятой."""
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '?')
+        names.append(f'{module}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Статистический профилировщик на SIGPROF.
+
+    Пока выполняется хотя бы один профилируемый запрос, таймер
+    ITIMER_PROF каждые PROFILER_INTERVAL_MS миллисекунд процессорного
+    времени вызывает обработчик сигнала, который записывает стеки
+    потоков этих запросов. Ожидание ввода-вывода (например, БД) таймер
+    не учитывает, для него есть журнал медленных запросов.
+    Обработчик выполняется в главном потоке, поэтому устанавливается
+    при запуске приложения, и не берет блокировок: их может держать
+    прерванный код.
+    """
+
+    def __init__(self):
+        self.installed = False
+        self.lock = threading.Lock()
+        self.threads = {}
+
+    def install(self):
+        if threading.current_thread() is not threading.main_thread():
+            logger.warning(
+                'Профилировщик не установлен: приложение запущено '
+                'не в главном потоке.'
+            )
+            return
+        signal.signal(signal.SIGPROF, self.sample)
+        self.installed = True
+
+    def sample(self, signum, frame):
+        frames = sys._current_frames()
+        # Для главного потока берется прерванный кадр, а не сам обработчик.
+        frames[threading.main_thread().ident] = frame
+        for thread_id, diagnostics in list(self.threads.items()):
+            thread_frame = frames.get(thread_id)
+            if thread_frame is not None:
+                diagnostics.samples[collapse_stack(thread_frame)] += 1
+
+    @contextmanager
+    def profile_thread(self):
+        """Записывает стеки текущего потока, если текущий
+        запрос попал в профилирование."""
+        diagnostics = get_current_diagnostics()
+        if diagnostics is None or not diagnostics.sampled:
+            yield
+            return
+        thread_id = threading.get_ident()
+        interval = settings.PROFILER_INTERVAL_MS / 1000
+        with self.lock:
+            self.threads[thread_id] = diagnostics
+            if len(self.threads) == 1:
+                signal.setitimer(signal.ITIMER_PROF, interval, interval)
+        try:
+            yield
+        finally:
+            with self.lock:
+                del self.threads[thread_id]
+                if not self.threads:
+                    signal.setitimer(signal.ITIMER_PROF, 0)
+
+    def dump(self, endpoint, samples):
+        """Дописывает стеки запроса в файл вьюхи
+        <PROFILER_OUTPUT_DIR>/<вьюха>.<pid>.folded."""
+        name = re.sub(r'[^\w.-]', '_', endpoint or 'unmatched')
+        path = os.path.join(
+            settings.PROFILER_OUTPUT_DIR, f'{name}.{os.getpid()}.folded'
+        )
+        # Обработчик сигнала может дописать выборку во время записи.
+        samples = list(samples.items())
+        try:
+            os.makedirs(settings.PROFILER_OUTPUT_DIR, exist_ok=True)
+            with open(path, 'a', encoding='utf8') as file:
+                file.writelines(
+                    f'{stack} {count}\n' for stack, count in samples
+                )
+        except OSError:
+            logger.exception('Не удалось записать профиль в %s', path)
+
+
+profiler = SamplingProfiler()
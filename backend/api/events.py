@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import select
+from collections import defaultdict
+from threading import Lock, Thread
+from time import sleep
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from foodgram_backend.constants import (
+    RECIPE_EVENTS_CHANNEL,
+    RECIPE_EVENTS_KEEPALIVE,
+    RECIPE_EVENTS_POLL_INTERVAL,
+)
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+EVENT_FIELDS = ('id', 'name', 'author_id', 'pub_date')
+
+
+def recipe_event(values):
+    """Событие о новом рецепте из словаря с полями EVENT_FIELDS."""
+    return {
+        'id': values['id'],
+        'name': values['name'],
+        'author': values['author_id'],
+        'pub_date': values['pub_date'].isoformat(),
+    }
+
+
+def notify_new_recipe(recipe):
+    """Отправляет событие о рецепте всем процессам через NOTIFY после
+    фиксации транзакции. На других базах новые рецепты находит опрос."""
+    if connection.vendor != 'postgresql':
+        return
+    payload = json.dumps(recipe_event(
+        {field: getattr(recipe, field) for field in EVENT_FIELDS}
+    ))
+
+    def notify():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)', [RECIPE_EVENTS_CHANNEL, payload]
+            )
+
+    transaction.on_commit(notify)
+
+
+class ListenFeed(Thread):
+    """Получает события через LISTEN на отдельном соединении
+    с PostgreSQL. После обрыва соединения подключается заново,
+    события за время переподключения теряются."""
+
+    def __init__(self, publish):
+        super().__init__(name='recipe-events-listen', daemon=True)
+        self.publish = publish
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception('Ошибка LISTEN %s', RECIPE_EVENTS_CHANNEL)
+                connection.close()
+                sleep(RECIPE_EVENTS_POLL_INTERVAL)
+
+    def listen(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {RECIPE_EVENTS_CHANNEL}')
+        raw = connection.connection
+        while True:
+            if not select.select([raw], [], [], RECIPE_EVENTS_KEEPALIVE)[0]:
+                continue
+            raw.poll()
+            while raw.notifies:
+                self.publish(json.loads(raw.notifies.pop(0).payload))
+
+
+class PollingFeed(Thread):
+    """Опрашивает таблицу рецептов раз в RECIPE_EVENTS_POLL_INTERVAL
+    секунд: для баз без LISTEN/NOTIFY, например SQLite."""
+
+    def __init__(self, publish):
+        super().__init__(name='recipe-events-poll', daemon=True)
+        self.publish = publish
+
+    def run(self):
+        last_id = None
+        while True:
+            try:
+                if last_id is None:
+                    last_id = Recipe.objects.aggregate(
+                        last_id=Max('id')
+                    )['last_id'] or 0
+                recipes = Recipe.objects.filter(
+                    id__gt=last_id
+                ).order_by('id').values(*EVENT_FIELDS)
+                for values in recipes:
+                    last_id = values['id']
+                    self.publish(recipe_event(values))
+            except Exception:
+                logger.exception('Ошибка опроса новых рецептов')
+                connection.close()
+            sleep(RECIPE_EVENTS_POLL_INTERVAL)
+
+
+class RecipeEventBroker:
+    """Рассылка событий о новых рецептах внутри процесса.
+
+    Подписчик — очередь asyncio с набором авторов, подписка и рассылка
+    выполняются в цикле событий. События приходят из потока источника
+    (ListenFeed на PostgreSQL, PollingFeed на остальных базах), который
+    запускается при первой подписке. Если очередь медленного клиента
+    заполнена, событие для него пропускается: после переподключения
+    с Last-Event-ID клиент получит пропущенное.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.loop = None
+        self.feed = None
+        self.queues = defaultdict(set)
+        self.authors = {}
+
+    def start(self):
+        with self.lock:
+            if self.feed is not None:
+                return
+            self.loop = asyncio.get_running_loop()
+            feed_class = (
+                ListenFeed if connection.vendor == 'postgresql'
+                else PollingFeed
+            )
+            self.feed = feed_class(self.publish)
+            self.feed.start()
+
+    def subscribe(self, queue, authors):
+        self.start()
+        self.unsubscribe(queue)
+        self.authors[queue] = authors
+        for author in authors:
+            self.queues[author].add(queue)
+
+    def unsubscribe(self, queue):
+        for author in self.authors.pop(queue, ()):
+            queues = self.queues[author]
+            queues.discard(queue)
+            if not queues:
+                del self.queues[author]
+
+    def publish(self, event):
+        """Вызывается из потока источника."""
+        self.loop.call_soon_threadsafe(self.dispatch, event)
+
+    def dispatch(self, event):
+        for queue in self.queues.get(event['author'], ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+
+broker = RecipeEventBroker()
@@ -0,0 +1,119 @@
+import random
+from statistics import mean, quantiles
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.metrics import collect_metrics, instrument_connections
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для замера задержек основных эндпоинтов API.
+    """
+    help = ('Замер задержек и числа SQL-запросов эндпоинтов API '
+            'через тестовый клиент Django на текущей базе данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Число запросов на сценарий.')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--user', type=int,
+                            help='id пользователя, от имени которого '
+                                 'выполняются запросы.')
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэш перед каждым запросом.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def get_scenarios(self):
+        recipe_ids = list(Recipe.objects.values_list('id', flat=True)[:1000])
+        tag_slugs = list(Tag.objects.values_list('slug', flat=True))
+        ingredient_prefixes = [
+            name[:2] for name in Ingredient.objects.values_list(
+                'name', flat=True
+            )[:200]
+        ]
+        if not recipe_ids:
+            raise CommandError(
+                'В базе нет рецептов, запустите manage.py seed_data.'
+            )
+        return (
+            ('Список рецептов', lambda: '/api/recipes/?page={}'.format(
+                random.randint(1, 10))),
+            ('Список рецептов по тэгу', lambda: '/api/recipes/?tags={}'.format(
+                random.choice(tag_slugs))),
+            ('Рецепт', lambda: '/api/recipes/{}/'.format(
+                random.choice(recipe_ids))),
+            ('Подписки', lambda: '/api/users/subscriptions/?recipes_limit=3'),
+            ('Поиск ингредиентов', lambda: '/api/ingredients/?name={}'.format(
+                random.choice(ingredient_prefixes))),
+            ('Скачивание списка покупок',
+             lambda: '/api/recipes/download_shopping_cart/'),
+        )
+
+    def run_scenario(self, client, make_url, options):
+        for _ in range(options['warmup']):
+            client.get(make_url())
+        timings = []
+        queries = []
+        for _ in range(options['requests']):
+            url = make_url()
+            if options['cold']:
+                cache.clear()
+            # Учитываются запросы ко всем базам, в том числе к репликам,
+            # и из потоков пула асинхронных вьюх.
+            with collect_metrics() as metrics, instrument_connections():
+                start = perf_counter()
+                response = client.get(url)
+                timings.append((perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{url}: статус {response.status_code}'
+                )
+            queries.append(metrics.queries)
+        return timings, queries
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        if options['user'] is not None:
+            user = User.objects.get(id=options['user'])
+        else:
+            user = User.objects.filter(subscriber__isnull=False).first()
+        if user is None:
+            raise CommandError('Нет пользователя с подписками.')
+        token, _ = Token.objects.get_or_create(user=user)
+        client = Client(
+            HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+        # Ограничение частоты запросов не должно прерывать замер.
+        rest_framework = settings.REST_FRAMEWORK
+        with override_settings(REST_FRAMEWORK={
+            **rest_framework,
+            'DEFAULT_THROTTLE_RATES': dict.fromkeys(
+                rest_framework.get('DEFAULT_THROTTLE_RATES', ())
+            ),
+        }):
+            self.run_benchmark(client, options)
+
+    def run_benchmark(self, client, options):
+        self.stdout.write(
+            f"{'Сценарий':<28}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+            f"{'SQL':>7}"
+        )
+        for name, make_url in self.get_scenarios():
+            timings, queries = self.run_scenario(client, make_url, options)
+            percentiles = quantiles(timings, n=100, method='inclusive')
+            self.stdout.write(
+                f'{name:<28}{percentiles[49]:>9.1f}{percentiles[89]:>9.1f}'
+                f'{percentiles[98]:>9.1f}{max(timings):>9.1f}'
+                f'{mean(queries):>7.1f}'
+            )
+        self.stdout.write('Время в миллисекундах, SQL — среднее число '
+                          'запросов к БД.')
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BOOT_SCRIPT = '''
+from time import perf_counter
+start = perf_counter()
+import foodgram_backend.{app}
+from importlib import import_module
+from django.conf import settings
+import_module(settings.ROOT_URLCONF)
+print(perf_counter() - start)
+'''
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для замера времени импорта при старте воркера.
+    """
+    help = ('Замер времени старта воркера через python -X importtime: '
+            'загрузка приложения и URLconf в отдельном процессе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--app', choices=('asgi', 'wsgi'), default='asgi')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--forbid', nargs='*', default=['reportlab'],
+            help='Пакеты, которые не должны импортироваться при старте.'
+        )
+        parser.add_argument(
+            '--max-ms', type=float, default=None,
+            help='Порог времени старта, при превышении команда завершится '
+                 'с ошибкой.'
+        )
+
+    def run_boot(self, app):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             BOOT_SCRIPT.format(app=app)],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        packages = defaultdict(int)
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            self_time, _, name = line[len('import time:'):].split('|')
+            if not self_time.strip().isdigit():
+                continue
+            packages[name.strip().split('.')[0]] += int(self_time)
+        return float(result.stdout.strip().splitlines()[-1]), packages
+
+    def handle(self, *args, **options):
+        runs = [self.run_boot(options['app'])
+                for _ in range(options['repeat'])]
+        boot_time, packages = min(runs, key=lambda run: run[0])
+        self.stdout.write(
+            f'Старт foodgram_backend.{options["app"]}: '
+            f'{boot_time * 1000:.1f} мс (минимум из {options["repeat"]}), '
+            f'импорт модулей: {sum(packages.values()) / 1000:.1f} мс'
+        )
+        top = sorted(packages.items(), key=lambda item: -item[1])
+        for name, microseconds in top[:options['top']]:
+            self.stdout.write(f'{microseconds / 1000:9.1f} мс  {name}')
+        forbidden = sorted(set(options['forbid']).intersection(packages))
+        if forbidden:
+            raise CommandError(
+                'При старте импортируются: ' + ', '.join(forbidden)
+            )
+        if (
+            options['max_ms'] is not None
+            and boot_time * 1000 > options['max_ms']
+        ):
+            raise CommandError(
+                f'Старт занял {boot_time * 1000:.1f} мс '
+                f'при пороге {options["max_ms"]} мс'
+            )
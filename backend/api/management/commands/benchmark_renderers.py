@@ -0,0 +1,86 @@
+from timeit import repeat
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.v1.renderers import ORJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для сравнения скорости рендеринга JSON.
+    """
+    help = ('Сравнение JSONRenderer и ORJSONRenderer '
+            'на странице из 100 рецептов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument('--ingredients', type=int, default=10)
+        parser.add_argument('--number', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def build_page(self, recipes, ingredients):
+        """Страница списка рецептов в формате RecipeSerializer."""
+        return {
+            'count': recipes,
+            'next': 'http://localhost/api/recipes/?page=2',
+            'previous': None,
+            'results': [
+                {
+                    'id': recipe_id,
+                    'author': {
+                        'id': recipe_id,
+                        'email': f'user{recipe_id}@example.com',
+                        'username': f'user{recipe_id}',
+                        'first_name': 'Иван',
+                        'last_name': 'Иванов',
+                        'is_subscribed': False,
+                    },
+                    'tags': [
+                        {'id': tag_id, 'name': f'Тэг {tag_id}',
+                         'color': '#E26C2D', 'slug': f'tag{tag_id}'}
+                        for tag_id in range(3)
+                    ],
+                    'ingredients': [
+                        {'id': ingredient_id,
+                         'name': f'Ингредиент {ingredient_id}',
+                         'measurement_unit': 'г',
+                         'amount': ingredient_id + 1}
+                        for ingredient_id in range(ingredients)
+                    ],
+                    'is_favorited': recipe_id % 2 == 0,
+                    'is_in_shopping_cart': False,
+                    'name': f'Рецепт {recipe_id}',
+                    'image': f'http://localhost/media/recipes/images/'
+                             f'{recipe_id}.png',
+                    'text': 'Описание рецепта. ' * 20,
+                    'cooking_time': 30,
+                }
+                for recipe_id in range(recipes)
+            ],
+        }
+
+    def handle(self, *args, **options):
+        page = self.build_page(options['recipes'], options['ingredients'])
+        if orjson is None:
+            self.stdout.write(
+                'orjson не установлен, ORJSONRenderer использует '
+                'стандартный json.'
+            )
+        results = {}
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            timings = repeat(
+                lambda: renderer.render(page),
+                number=options['number'],
+                repeat=options['repeat'],
+            )
+            best = min(timings) / options['number'] * 1000
+            results[type(renderer).__name__] = best
+            self.stdout.write(
+                f'{type(renderer).__name__}: {best:.3f} мс на страницу, '
+                f'{len(renderer.render(page))} байт'
+            )
+        self.stdout.write(
+            'Ускорение: '
+            f"{results['JSONRenderer'] / results['ORJSONRenderer']:.1f}x"
+        )
@@ -0,0 +1,188 @@
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+from django.db import connections
+
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Метрики одного запроса."""
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.render_start = None
+        self.serializer_depth = 0
+        self.statements = []
+
+    @property
+    def queries(self):
+        return len(self.statements)
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.statements.append(sql)
+
+
+def get_current_metrics():
+    return _current.get()
+
+
+@contextmanager
+def collect_metrics():
+    """Начинает сбор метрик. Вложенный вызов продолжает внешний сбор."""
+    metrics = get_current_metrics()
+    if metrics is not None:
+        yield metrics
+        return
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def instrument_connections():
+    """Учитывает SQL-запросы соединений текущего потока
+    в метриках текущего запроса."""
+    metrics = get_current_metrics()
+    with ExitStack() as stack:
+        if metrics is not None:
+            for connection in connections.all():
+                if metrics.execute_wrapper in connection.execute_wrappers:
+                    continue
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.execute_wrapper)
+                )
+        yield
+
+
+@contextmanager
+def serializer_timer():
+    """Учитывает время сериализации. Вложенные вызовы не суммируются."""
+    metrics = get_current_metrics()
+    if metrics is None:
+        yield
+        return
+    metrics.serializer_depth += 1
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += perf_counter() - start
+
+
+def get_query_budget(view, method):
+    """Бюджет SQL-запросов, объявленный во вьюсете атрибутом query_budget:
+    числом или словарем {действие: число}."""
+    view_class = getattr(view, 'cls', None)
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(view, 'actions', None) or {}
+        return budget.get(actions.get(method.lower(), method.lower()))
+    return budget
+
+
+class TimedSerializerMixin:
+    """Миксин сериализатора, учитывающий время получения data."""
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class MetricsRegistry:
+    """Агрегированные метрики запросов по эндпоинтам.
+    Хранятся в памяти процесса, каждый воркер отдаёт свои значения."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = defaultdict(int)
+        self.queries = defaultdict(int)
+        self.db_seconds = defaultdict(float)
+        self.serializer_seconds = defaultdict(float)
+        self.duration_sum = defaultdict(float)
+        self.duration_buckets = defaultdict(
+            lambda: [0] * len(DURATION_BUCKETS)
+        )
+
+    def record(self, endpoint, method, metrics, duration):
+        labels = (endpoint, method)
+        with self.lock:
+            self.requests[labels] += 1
+            self.queries[labels] += metrics.queries
+            self.db_seconds[labels] += metrics.db_time
+            self.serializer_seconds[labels] += metrics.serializer_time
+            self.duration_sum[labels] += duration
+            buckets = self.duration_buckets[labels]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+
+    def render_prometheus(self):
+        """Метрики в текстовом формате Prometheus."""
+        lines = []
+        with self.lock:
+            counters = (
+                ('foodgram_requests_total', 'counter',
+                 'Количество запросов.', self.requests),
+                ('foodgram_db_queries_total', 'counter',
+                 'Количество SQL-запросов.', self.queries),
+                ('foodgram_db_seconds_total', 'counter',
+                 'Время выполнения SQL-запросов.', self.db_seconds),
+                ('foodgram_serializer_seconds_total', 'counter',
+                 'Время сериализации.', self.serializer_seconds),
+            )
+            for name, kind, help_text, values in counters:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in sorted(values.items()):
+                    lines.append(f'{name}{{{format_labels(labels)}}} {value}')
+            name = 'foodgram_request_duration_seconds'
+            lines.append(f'# HELP {name} Полное время обработки запроса.')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, buckets in sorted(self.duration_buckets.items()):
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(
+                        f'{name}_bucket{{{format_labels(labels)},'
+                        f'le="{bound}"}} {count}'
+                    )
+                lines.append(
+                    f'{name}_bucket{{{format_labels(labels)},le="+Inf"}} '
+                    f'{self.requests[labels]}'
+                )
+                lines.append(
+                    f'{name}_sum{{{format_labels(labels)}}} '
+                    f'{self.duration_sum[labels]}'
+                )
+                lines.append(
+                    f'{name}_count{{{format_labels(labels)}}} '
+                    f'{self.requests[labels]}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    endpoint, method = labels
+    return f'endpoint="{endpoint}",method="{method}"'
+
+
+registry = MetricsRegistry()
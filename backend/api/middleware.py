@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram_backend.db import pin_user_to_primary
+
+from .diagnostics import diagnose_request, profiler
+from .metrics import (
+    collect_metrics,
+    get_current_metrics,
+    get_query_budget,
+    instrument_connections,
+    registry,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """Собирает число SQL-запросов, время БД, сериализации, рендеринга
+    и полное время запроса. Отдаёт их в заголовке Server-Timing
+    и накапливает для /api/_metrics. Включается настройкой METRICS_ENABLED.
+
+    Под ASGI SQL-запросы учитываются для вьюх, обернутых в async_view:
+    они выполняются в пуле потоков, где и подключается учет.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with collect_metrics() as metrics:
+            start = perf_counter()
+            with instrument_connections():
+                response = self.get_response(request)
+            return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        with collect_metrics() as metrics:
+            start = perf_counter()
+            response = await self.get_response(request)
+            return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        end = perf_counter()
+        render_time = 0.0
+        if metrics.render_start is not None:
+            render_time = end - metrics.render_start
+        duration = end - start
+        resolver_match = request.resolver_match
+        endpoint = resolver_match.view_name if resolver_match else 'unmatched'
+        registry.record(endpoint, request.method, metrics, duration)
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries"',
+            f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+            f'render;dur={render_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ))
+        if resolver_match:
+            budget = get_query_budget(resolver_match.func, request.method)
+            if budget is not None and metrics.queries > budget:
+                logger.warning(
+                    '%s %s: %s SQL-запросов при бюджете %s',
+                    request.method, request.path, metrics.queries, budget
+                )
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = get_current_metrics()
+        if metrics is not None and metrics.render_start is None:
+            metrics.render_start = perf_counter()
+        return response
+
+
+class DiagnosticsMiddleware:
+    """Связывает SQL-запросы с вьюхой для журнала медленных запросов
+    и профилирует долю запросов (настройки SLOW_QUERY_MS
+    и PROFILER_SAMPLE_RATE).
+
+    Под ASGI профилируются вьюхи, обернутые в async_view: стеки
+    записываются для потока пула, в котором выполняется вьюха.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not (settings.SLOW_QUERY_MS or profiler.installed):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with diagnose_request(request), profiler.profile_thread():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with diagnose_request(request):
+            return await self.get_response(request)
+
+
+class ReplicaStickinessMiddleware:
+    """После изменяющего запроса пользователь на короткое время читает
+    с основной базы, чтобы увидеть свои изменения (read-your-writes).
+    Используется, только если настроены реплики.
+
+    Пользователь берется из request после ответа: DRF записывает туда
+    пользователя, аутентифицированного по токену.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.pin(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        await sync_to_async(self.pin)(request)
+        return response
+
+    def pin(self, request):
+        if request.method in SAFE_METHODS:
+            return
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_user_to_primary(user.id)
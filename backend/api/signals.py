@@ -0,0 +1,151 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from api.events import notify_new_recipe
+from api.tasks import schedule_shopping_list_render
+from api.v1.cache import (
+    bump_recipe_fragments_version,
+    invalidate_recipe_fragments,
+    invalidate_user_relations,
+)
+from recipes.deletion import bulk_deleted
+from recipes.models import (
+    Favorites,
+    Ingredient,
+    Recipe,
+    RecipeIngredients,
+    ShoppingCart,
+    Tag,
+)
+from recipes.shopping_list import refresh_shopping_lists
+from users.models import Subscribe, User
+
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Favorites)
+@receiver(post_delete, sender=Favorites)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscribe)
+@receiver(post_delete, sender=Subscribe)
+def reset_user_relations(sender, instance, **kwargs):
+    """Сбрасывает кэш связей пользователя при их изменении."""
+    invalidate_user_relations(instance.user_id)
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def render_shopping_list(sender, instance, **kwargs):
+    """Перестраивает PDF списка покупок в фоне."""
+    schedule_shopping_list_render(instance.user_id)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    """Новый рецепт пересчитывает только свои ингредиенты. Изменение
+    записи (количество или рецепт) пересчитывает весь список."""
+    if not created:
+        refresh_shopping_lists([instance.user_id])
+        return
+    refresh_shopping_lists(
+        [instance.user_id],
+        RecipeIngredients.objects.filter(
+            recipe_id=instance.recipe_id
+        ).values('ingredient'),
+    )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remember_shopping_list_ingredients(sender, instance, **kwargs):
+    """Ингредиенты рецепта запоминаются до удаления: при каскадном
+    удалении рецепта они могут быть удалены раньше записи списка покупок."""
+    instance._shopping_list_ingredients = list(
+        RecipeIngredients.objects.filter(
+            recipe_id=instance.recipe_id
+        ).values_list('ingredient_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    refresh_shopping_lists(
+        [instance.user_id],
+        getattr(instance, '_shopping_list_ingredients', None),
+    )
+
+
+@receiver(bulk_deleted, sender=ShoppingCart)
+def refresh_bulk_shopping_lists(sender, rows, **kwargs):
+    refresh_shopping_lists(list({row['user_id'] for row in rows}))
+
+
+@receiver(bulk_deleted, sender=Favorites)
+@receiver(bulk_deleted, sender=ShoppingCart)
+@receiver(bulk_deleted, sender=Subscribe)
+def reset_bulk_user_relations(sender, rows, **kwargs):
+    """Массовое удаление не отправляет post_delete,
+    кэш связей сбрасывается по пачке удаленных строк."""
+    for user_id in {row['user_id'] for row in rows}:
+        invalidate_user_relations(user_id)
+
+
+@receiver(bulk_deleted, sender=Recipe)
+def reset_bulk_recipe_fragments(sender, rows, **kwargs):
+    invalidate_recipe_fragments([row['pk'] for row in rows])
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def reset_recipe_fragment(sender, instance, **kwargs):
+    invalidate_recipe_fragments([instance.id])
+
+
+@receiver(post_save, sender=Recipe)
+def announce_new_recipe(sender, instance, created, **kwargs):
+    """Событие для потока новых рецептов подписок."""
+    if created:
+        notify_new_recipe(instance)
+
+
+@receiver(post_save, sender=RecipeIngredients)
+@receiver(post_delete, sender=RecipeIngredients)
+def reset_recipe_ingredients_fragment(sender, instance, **kwargs):
+    invalidate_recipe_fragments([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def reset_recipe_tags_fragment(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_recipe_fragments([instance.id])
+    elif pk_set:
+        invalidate_recipe_fragments(pk_set)
+    else:
+        bump_recipe_fragments_version()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def reset_all_recipe_fragments(sender, **kwargs):
+    """Тэги и ингредиенты входят во многие рецепты,
+    поэтому их изменение сбрасывает все фрагменты."""
+    bump_recipe_fragments_version()
+
+
+@receiver(post_save, sender=User)
+def reset_author_recipe_fragments(sender, instance, update_fields, **kwargs):
+    if update_fields and not AUTHOR_FIELDS.intersection(update_fields):
+        return
+    invalidate_recipe_fragments(
+        instance.recipes.values_list('id', flat=True)
+    )
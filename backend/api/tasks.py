@@ -0,0 +1,22 @@
+from django.conf import settings
+
+from api.v1.pdf import get_shopping_list_file
+from foodgram_backend.constants import SHOPPING_LIST_RENDER_DELAY
+from jobs.registry import enqueue, task
+
+
+@task('api.render_shopping_list')
+def render_shopping_list(user_id):
+    """Заранее строит PDF списка покупок,
+    чтобы скачивание отдавало готовый файл."""
+    get_shopping_list_file(user_id)
+
+
+def schedule_shopping_list_render(user_id):
+    """Ставит построение PDF в очередь. Задача откладывается
+    на несколько секунд, чтобы серия изменений дала одну задачу."""
+    if settings.JOBS_ENABLED:
+        enqueue(
+            'api.render_shopping_list', {'user_id': user_id},
+            delay=SHOPPING_LIST_RENDER_DELAY, unique=True,
+        )
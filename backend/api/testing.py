@@ -0,0 +1,26 @@
+from urllib.parse import urlsplit
+
+from django.urls import resolve
+
+from .metrics import collect_metrics, get_query_budget, instrument_connections
+
+
+class QueryBudgetMixin:
+    """Миксин для TestCase: проверяет, что запрос к эндпоинту укладывается
+    в бюджет SQL-запросов, объявленный во вьюсете атрибутом query_budget.
+    Запросы учитываются и для вьюх, выполняемых в пуле потоков."""
+
+    def assertWithinQueryBudget(self, method, path, data=None, client=None,
+                                **extra):
+        client = client or self.client
+        budget = get_query_budget(resolve(urlsplit(path).path).func, method)
+        if budget is None:
+            self.fail(f'Для {method} {path} не объявлен query_budget.')
+        with collect_metrics() as metrics, instrument_connections():
+            response = getattr(client, method.lower())(path, data, **extra)
+        if metrics.queries > budget:
+            self.fail(
+                f'{method} {path}: {metrics.queries} SQL-запросов '
+                f'при бюджете {budget}:\n' + '\n'.join(metrics.statements)
+            )
+        return response
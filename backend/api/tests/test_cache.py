@@ -0,0 +1,172 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from api.tests.utils import (
+    TEST_DATABASES,
+    TemporaryMediaMixin,
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user,
+    get_token,
+)
+from api.v1.cache import (
+    RECIPE_FRAGMENTS_VERSION_KEY,
+    bump_recipe_fragments_version,
+    get_recipe_fragments,
+    get_version,
+    invalidate_recipe_fragments,
+)
+
+
+class VersionTests(APITestCase):
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        cache.clear()
+
+    def test_evicted_version_is_not_reused(self):
+        version = get_version(RECIPE_FRAGMENTS_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_recipe_fragments_version()
+        bumped = get_version(RECIPE_FRAGMENTS_VERSION_KEY)
+        self.assertNotEqual(bumped, version)
+        cache.delete(RECIPE_FRAGMENTS_VERSION_KEY)
+        self.assertNotIn(
+            get_version(RECIPE_FRAGMENTS_VERSION_KEY), (version, bumped)
+        )
+
+    def test_version_changes_after_commit(self):
+        version = get_version(RECIPE_FRAGMENTS_VERSION_KEY)
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump_recipe_fragments_version()
+            self.assertEqual(
+                get_version(RECIPE_FRAGMENTS_VERSION_KEY), version
+            )
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_version(RECIPE_FRAGMENTS_VERSION_KEY), version)
+
+    def test_invalidation_during_build_is_not_lost(self):
+        recipe = mock.Mock(id=1)
+
+        def build_stale(recipes):
+            # Рецепт изменили, пока фрагмент строился по старым данным.
+            with self.captureOnCommitCallbacks(execute=True):
+                invalidate_recipe_fragments([recipe.id])
+            return {recipe.id: 'старый'}
+
+        get_recipe_fragments([recipe], build_stale)
+        self.assertEqual(
+            get_recipe_fragments([recipe], lambda recipes: {1: 'новый'}),
+            {1: 'новый'},
+        )
+
+
+class CacheInvalidationTests(TemporaryMediaMixin, APITestCase):
+    """Изменения сбрасывают закэшированные связи пользователя
+    и фрагменты рецептов."""
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.author = create_user('author')
+        cls.ingredient = create_ingredient('Мука')
+        cls.tag = create_tag('breakfast')
+        cls.recipe = create_recipe(
+            cls.author, ingredients=[(cls.ingredient, 100)], tags=[cls.tag]
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {get_token(user)}')
+
+    def get_recipe(self):
+        return self.client.get(f'/api/recipes/{self.recipe.id}/').json()
+
+    def test_follow_and_unfollow(self):
+        self.login(self.reader)
+        url = f'/api/users/{self.author.id}/subscribe/'
+        self.assertFalse(self.get_recipe()['author']['is_subscribed'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertTrue(self.get_recipe()['author']['is_subscribed'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(self.get_recipe()['author']['is_subscribed'])
+
+    def test_favorite(self):
+        self.login(self.reader)
+        url = f'/api/recipes/{self.recipe.id}/favorite/'
+        self.assertFalse(self.get_recipe()['is_favorited'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertTrue(self.get_recipe()['is_favorited'])
+
+    def test_recipe_edit(self):
+        self.login(self.author)
+        self.assertEqual(self.get_recipe()['name'], 'Рецепт')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.id}/',
+                {
+                    'name': 'Новое название',
+                    'text': 'Описание',
+                    'cooking_time': 5,
+                    'tags': [self.tag.id],
+                    'ingredients': [{'id': self.ingredient.id, 'amount': 7}],
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        recipe = self.get_recipe()
+        self.assertEqual(recipe['name'], 'Новое название')
+        self.assertEqual(recipe['ingredients'][0]['amount'], 7)
+        self.login(self.reader)
+        self.assertEqual(self.get_recipe()['name'], 'Новое название')
+
+
+@override_settings(ANONYMOUS_RESPONSE_CACHE=True)
+class AnonymousResponseCacheTests(TemporaryMediaMixin, APITestCase):
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.recipe = create_recipe(cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_names(self):
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['name'] for recipe in response.json()['results']]
+
+    def test_response_is_cached(self):
+        self.assertEqual(self.get_names(), ['Рецепт'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_names(), ['Рецепт'])
+
+    def test_write_invalidates_cached_list(self):
+        self.assertEqual(self.get_names(), ['Рецепт'])
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {get_token(self.author)}'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/recipes/{self.recipe.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.client.credentials()
+        self.assertEqual(self.get_names(), [])
+
+    @override_settings(ANONYMOUS_RESPONSE_CACHE=False)
+    def test_disabled_without_shared_cache(self):
+        self.get_names()
+        with self.assertNumQueries(2):
+            self.get_names()
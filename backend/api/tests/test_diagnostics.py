@@ -0,0 +1,149 @@
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+from collections import Counter
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api.diagnostics import (
+    SamplingProfiler,
+    collapse_stack,
+    diagnose_request,
+    log_slow_query,
+)
+from api.tests.utils import TEST_DATABASES
+
+ENDPOINT = 'api:recipes-list'
+
+
+def make_request():
+    return SimpleNamespace(resolver_match=SimpleNamespace(view_name=ENDPOINT))
+
+
+def outer():
+    return inner()
+
+
+def inner():
+    return collapse_stack(sys._getframe())
+
+
+class SlowQueryLogTests(TestCase):
+    databases = TEST_DATABASES
+
+    def execute(self, duration):
+        """Выполняет запрос через log_slow_query, который длится
+        duration секунд по perf_counter."""
+        execute = mock.Mock(return_value='result')
+        with mock.patch(
+            'api.diagnostics.perf_counter', side_effect=[10, 10 + duration]
+        ):
+            result = log_slow_query(execute, 'SELECT 1', (), False, {})
+        self.assertEqual(result, 'result')
+        execute.assert_called_once_with('SELECT 1', (), False, {})
+
+    @override_settings(SLOW_QUERY_MS=100)
+    def test_logs_slow_query_with_endpoint_and_stack(self):
+        with diagnose_request(make_request()):
+            with self.assertLogs('api.diagnostics', 'WARNING') as logs:
+                self.execute(0.25)
+        [message] = logs.output
+        self.assertIn('250.0 мс', message)
+        self.assertIn(ENDPOINT, message)
+        # Место вызова — код проекта, от последнего вызова к первым.
+        stack = message.split(', ')[2]
+        self.assertRegex(
+            stack, r'^api/tests/test_diagnostics\.py:\d+ execute <- '
+        )
+        self.assertIn('test_logs_slow_query_with_endpoint_and_stack', stack)
+        self.assertTrue(message.endswith('SELECT 1'))
+
+    @override_settings(SLOW_QUERY_MS=100)
+    def test_fast_query_is_not_logged(self):
+        with mock.patch('api.diagnostics.logger') as logger:
+            self.execute(0.05)
+        logger.warning.assert_not_called()
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_outside_request(self):
+        with self.assertLogs('api.diagnostics', 'WARNING') as logs:
+            with connection.execute_wrapper(log_slow_query):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+        [message] = logs.output
+        self.assertIn(' мс, -, ', message)
+
+
+class CollapseStackTests(SimpleTestCase):
+
+    def test_order_from_root_to_leaf(self):
+        names = outer().split(';')
+        self.assertEqual(names[-2:], [
+            'api.tests.test_diagnostics:outer',
+            'api.tests.test_diagnostics:inner',
+        ])
+        self.assertIn(
+            'api.tests.test_diagnostics:test_order_from_root_to_leaf',
+            names[:-2],
+        )
+
+
+class SamplingProfilerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.profiler = SamplingProfiler()
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+
+    def test_sample_records_registered_threads(self):
+        started, stop = threading.Event(), threading.Event()
+
+        def wait_in_worker():
+            started.set()
+            stop.wait()
+
+        worker = threading.Thread(target=wait_in_worker)
+        worker.start()
+        self.addCleanup(worker.join)
+        self.addCleanup(stop.set)
+        started.wait()
+        main = SimpleNamespace(samples=Counter())
+        other = SimpleNamespace(samples=Counter())
+        self.profiler.threads = {
+            threading.main_thread().ident: main,
+            worker.ident: other,
+        }
+        for _ in range(2):
+            self.profiler.sample(signal.SIGPROF, sys._getframe())
+        [(stack, count)] = main.samples.items()
+        self.assertEqual(count, 2)
+        self.assertTrue(stack.endswith(
+            'api.tests.test_diagnostics:'
+            'test_sample_records_registered_threads'
+        ))
+        [(stack, count)] = other.samples.items()
+        self.assertEqual(count, 2)
+        self.assertIn('test_diagnostics:wait_in_worker', stack)
+
+    def test_dump_appends_to_endpoint_file(self):
+        with override_settings(PROFILER_OUTPUT_DIR=self.output_dir):
+            self.profiler.dump(ENDPOINT, Counter({'a;b': 2, 'a;c': 1}))
+            self.profiler.dump(ENDPOINT, Counter({'a;b': 3}))
+            self.profiler.dump(None, Counter({'a': 1}))
+        path = os.path.join(
+            self.output_dir, f'api_recipes-list.{os.getpid()}.folded'
+        )
+        with open(path, encoding='utf8') as file:
+            self.assertEqual(file.read().splitlines(), [
+                'a;b 2', 'a;c 1', 'a;b 3',
+            ])
+        self.assertEqual(sorted(os.listdir(self.output_dir)), sorted([
+            f'api_recipes-list.{os.getpid()}.folded',
+            f'unmatched.{os.getpid()}.folded',
+        ]))
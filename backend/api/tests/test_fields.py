@@ -0,0 +1,59 @@
+import base64
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from api.v1.fields import RecipeImageField
+from foodgram_backend.constants import RECIPE_IMAGE_MAX_SIDE
+
+
+def make_jpeg(width, height, **kwargs):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'blue').save(buffer, 'JPEG', **kwargs)
+    return buffer.getvalue()
+
+
+def as_base64(content):
+    return 'data:image/jpeg;base64,' + base64.b64encode(content).decode()
+
+
+def as_upload(content):
+    return SimpleUploadedFile('image.jpg', content, 'image/jpeg')
+
+
+class RecipeImageFieldTests(SimpleTestCase):
+
+    def setUp(self):
+        self.field = RecipeImageField()
+        # Заголовок SOF с размерами идет после ICC-профиля в 60 КБ.
+        self.wide = make_jpeg(
+            RECIPE_IMAGE_MAX_SIDE + 1000, 8, icc_profile=b'\0' * 60000
+        )
+
+    def assertRejected(self, data, code):
+        with self.assertRaises(ValidationError) as context:
+            self.field.run_validation(data)
+        self.assertEqual(context.exception.get_codes(), [code])
+
+    def test_accepts_base64_and_upload(self):
+        content = make_jpeg(30, 20)
+        for data in (as_base64(content), as_upload(content)):
+            with self.subTest(type=type(data).__name__):
+                image = self.field.run_validation(data)
+                self.assertEqual(image.image.size, (30, 20))
+
+    def test_rejects_wide_base64_after_large_segment(self):
+        self.assertRejected(as_base64(self.wide), 'max_side')
+
+    def test_rejects_wide_upload_after_large_segment(self):
+        self.assertRejected(as_upload(self.wide), 'max_side')
+
+    def test_rejects_upload_that_is_not_image(self):
+        self.assertRejected(as_upload(b'not an image' * 10), 'invalid_image')
+
+    def test_rejects_upload_with_unknown_size(self):
+        # У BytesIO нет атрибута size, как у загруженного файла.
+        self.assertRejected(io.BytesIO(make_jpeg(30, 20)), 'invalid_image')
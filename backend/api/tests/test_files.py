@@ -0,0 +1,51 @@
+import os
+import time
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from api.tests.utils import TemporaryMediaMixin
+from api.v1.files import get_or_create_private_file
+from foodgram_backend.constants import PRIVATE_FILE_MAX_AGE
+
+
+class PrivateFileTests(TemporaryMediaMixin, SimpleTestCase):
+
+    def setUp(self):
+        self.directory = self._testMethodName
+
+    def create(self, name, build=lambda: b'pdf'):
+        return get_or_create_private_file(self.directory, name, build)
+
+    def test_creates_file_once(self):
+        path = self.create('a.pdf')
+        self.assertEqual(
+            path,
+            os.path.join(settings.PRIVATE_MEDIA_ROOT, self.directory, 'a.pdf'),
+        )
+        self.create('a.pdf', lambda: self.fail('Файл построен заново.'))
+        with open(path, 'rb') as file:
+            self.assertEqual(file.read(), b'pdf')
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['a.pdf'])
+
+    def test_removes_only_old_files(self):
+        old = self.create('old.pdf')
+        recent = self.create('recent.pdf')
+        expired = time.time() - PRIVATE_FILE_MAX_AGE - 1
+        os.utime(old, (expired, expired))
+        path = self.create('new.pdf')
+        self.assertEqual(
+            sorted(os.listdir(os.path.dirname(path))),
+            ['new.pdf', 'recent.pdf'],
+        )
+        self.assertTrue(os.path.exists(recent))
+
+    def test_removes_temporary_file_on_error(self):
+        def build():
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            self.create('broken.pdf', build)
+        self.assertEqual(os.listdir(
+            os.path.join(settings.PRIVATE_MEDIA_ROOT, self.directory)
+        ), [])
@@ -0,0 +1,109 @@
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.testing import QueryBudgetMixin
+from api.tests.utils import (
+    TEST_DATABASES,
+    TemporaryMediaMixin,
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user,
+    get_token,
+)
+from recipes.models import Favorites, ShoppingCart
+from users.models import Subscribe
+
+
+class QueryBudgetTests(QueryBudgetMixin, TemporaryMediaMixin, APITestCase):
+    """Число SQL-запросов не растет с числом рецептов и авторов."""
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        ingredients = [
+            create_ingredient(f'Ингредиент {number}') for number in range(3)
+        ]
+        tags = [
+            create_tag('breakfast', '#E26C2D'),
+            create_tag('dinner', '#49B64E'),
+        ]
+        for number in range(3):
+            author = create_user(f'author{number}')
+            Subscribe.objects.create(user=cls.reader, author=author)
+            for _ in range(3):
+                recipe = create_recipe(
+                    author,
+                    ingredients=[(item, 10) for item in ingredients],
+                    tags=tags,
+                )
+                Favorites.objects.create(user=cls.reader, recipe=recipe)
+                ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+        cls.recipe = recipe
+        cls.author = author
+        cls.tag = tags[0]
+        cls.ingredient = ingredients[0]
+
+    def setUp(self):
+        cache.clear()
+
+    def get_paths(self):
+        return [
+            '/api/recipes/',
+            f'/api/recipes/{self.recipe.id}/',
+            '/api/users/',
+            f'/api/users/{self.author.id}/',
+            '/api/tags/',
+            f'/api/tags/{self.tag.id}/',
+            '/api/ingredients/',
+            f'/api/ingredients/{self.ingredient.id}/',
+        ]
+
+    def assertPathsWithinBudget(self, paths):
+        for path in paths:
+            with self.subTest(path=path):
+                response = self.assertWithinQueryBudget('GET', path)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_anonymous(self):
+        self.assertPathsWithinBudget(self.get_paths())
+
+    def test_authenticated(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {get_token(self.reader)}'
+        )
+        self.assertPathsWithinBudget(self.get_paths() + [
+            '/api/users/me/',
+            '/api/users/subscriptions/',
+            '/api/shopping_list/',
+        ])
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_ALLOWED_IPS=['10.0.0.2'])
+class MetricsViewTests(APITestCase):
+    databases = TEST_DATABASES
+    url = '/api/_metrics'
+
+    def test_allowed_ip(self):
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_staff(self):
+        self.client.force_login(create_user('admin', is_staff=True))
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_other_ip_and_users_are_forbidden(self):
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.3')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_login(create_user('cook'))
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.3')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,135 @@
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from api.tests.utils import (
+    TEST_DATABASES,
+    TemporaryMediaMixin,
+    create_recipe,
+    create_user,
+    get_token,
+)
+from foodgram_backend.db import (
+    PRIMARY_PIN_KEY,
+    ReplicaRouter,
+    allow_replica_reads,
+    primary_reads,
+    replica_reads,
+)
+from recipes.models import Recipe
+
+REPLICAS = ['replica_1', 'replica_2', 'replica_3']
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def read(self):
+        return self.router.db_for_read(Recipe)
+
+    def test_reads_use_primary_by_default(self):
+        self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+
+    def test_writes_use_primary(self):
+        with replica_reads():
+            self.assertEqual(
+                self.router.db_for_write(Recipe), DEFAULT_DB_ALIAS
+            )
+
+    def test_one_replica_per_block(self):
+        for _ in range(10):
+            with replica_reads():
+                replica = self.read()
+                self.assertIn(replica, REPLICAS)
+                self.assertEqual({self.read() for _ in range(50)}, {replica})
+                with primary_reads():
+                    self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+                    with replica_reads():
+                        self.assertNotEqual(self.read(), DEFAULT_DB_ALIAS)
+                self.assertEqual(self.read(), replica)
+            self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+
+    def test_allow_replica_reads_until_block_exit(self):
+        with primary_reads():
+            allow_replica_reads()
+            replica = self.read()
+            self.assertIn(replica, REPLICAS)
+            self.assertEqual({self.read() for _ in range(50)}, {replica})
+        self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        with replica_reads():
+            self.assertEqual(self.read(), DEFAULT_DB_ALIAS)
+
+
+@skipUnless(
+    'replica_1' in settings.DATABASES,
+    'Нужна реплика: SQLITE=True SQLITE_REPLICA_DB=replica.sqlite3',
+)
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaStickinessTests(TemporaryMediaMixin, APITestCase):
+    """В тестах реплика использует соединение основной базы,
+    поэтому маршрут чтений проверяется по решениям роутера."""
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('cook')
+        cls.other = create_user('other')
+        cls.recipe = create_recipe(cls.other)
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {get_token(user)}')
+
+    def get_read_aliases(self, path):
+        """Базы, с которых читал GET-запрос к path."""
+        aliases = set()
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            aliases.add(alias)
+            return alias
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', record):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return aliases
+
+    def add_favorite(self):
+        response = self.client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        self.assertEqual(response.status_code, 201)
+
+    def test_safe_requests_read_from_replica(self):
+        for user in (None, self.user):
+            with self.subTest(user=user):
+                if user:
+                    self.login(user)
+                self.assertIn('replica_1', self.get_read_aliases('/api/tags/'))
+
+    def test_user_reads_own_writes_from_primary(self):
+        self.login(self.user)
+        self.add_favorite()
+        self.assertEqual(
+            self.get_read_aliases('/api/recipes/?is_favorited=1'),
+            {DEFAULT_DB_ALIAS},
+        )
+        self.login(self.other)
+        self.assertIn('replica_1', self.get_read_aliases('/api/recipes/'))
+
+    def test_replica_reads_resume_after_pin_expires(self):
+        self.login(self.user)
+        self.add_favorite()
+        cache.delete(PRIMARY_PIN_KEY.format(self.user.id))
+        self.assertIn('replica_1', self.get_read_aliases('/api/recipes/'))
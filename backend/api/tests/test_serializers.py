@@ -0,0 +1,133 @@
+from django.db.models import Count
+from django.test import SimpleTestCase
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api.tests.utils import (
+    TEST_DATABASES,
+    TemporaryMediaMixin,
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user,
+)
+from api.v1.serializers import (
+    RecipeFragmentMixin,
+    RecipeReadSerializer,
+    RecipeSerializer,
+    RecipeSimpleReadSerializer,
+    RecipeSimpleSerializer,
+    SubscribeReadSerializer,
+    SubscribeSerializer,
+)
+from recipes.models import Favorites, Recipe, ShoppingCart
+from users.models import Subscribe, User
+
+
+class LeanSerializersParityTests(TemporaryMediaMixin, APITestCase):
+    """Облегчённые сериализаторы выдают тот же JSON,
+    что и сериализаторы на ModelSerializer."""
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.author = create_user('author')
+        create_user('newbie')
+        flour = create_ingredient('Мука')
+        milk = create_ingredient('Молоко', 'мл')
+        breakfast = create_tag('breakfast')
+        dinner = create_tag('dinner', '#49B64E')
+        for number in range(4):
+            create_recipe(
+                cls.author,
+                name=f'Рецепт {number}',
+                ingredients=[(flour, 100 + number), (milk, 200)][number % 2:],
+                tags=[breakfast, dinner][:number % 3],
+            )
+        create_recipe(cls.reader, name='Без ингредиентов')
+        recipe = Recipe.objects.filter(author=cls.author).first()
+        Favorites.objects.create(user=cls.reader, recipe=recipe)
+        ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+        Subscribe.objects.create(user=cls.reader, author=cls.author)
+
+    def get_context(self, user=None, recipes_limit=None):
+        params = {}
+        if recipes_limit is not None:
+            params['recipes_limit'] = recipes_limit
+        request = Request(
+            APIRequestFactory().get('/api/users/subscriptions/', params)
+        )
+        if user is not None:
+            request.user = user
+        return {'request': request}
+
+    def assertSameJSON(self, reference, lean):
+        """reference и lean — функции, возвращающие данные сериализатора
+        для контекста; данные сравниваются для анонимного пользователя
+        и читателя с разными recipes_limit."""
+        renderer = JSONRenderer()
+        for user in (None, self.reader):
+            for recipes_limit in (None, 0, 2):
+                with self.subTest(user=user, recipes_limit=recipes_limit):
+                    context = self.get_context(user, recipes_limit)
+                    self.assertEqual(
+                        renderer.render(lean(context)),
+                        renderer.render(reference(context)),
+                    )
+
+    def test_recipe(self):
+        # Фрагменты строятся напрямую: через общий кэш второй
+        # сериализатор получил бы фрагменты первого.
+        recipes = Recipe.objects.select_related('author').order_by('id')
+
+        def render(serializer_class):
+            def serialize(context):
+                serializer = serializer_class(context=context)
+                fragments = serializer.build_fragments(list(recipes))
+                return [
+                    serializer.add_viewer_data(fragments[recipe.id])
+                    for recipe in recipes
+                ]
+            return serialize
+
+        self.assertSameJSON(
+            render(RecipeSerializer), render(RecipeReadSerializer)
+        )
+
+    def test_short_recipe(self):
+        recipes = Recipe.objects.order_by('id')
+        self.assertSameJSON(
+            lambda context: RecipeSimpleSerializer(
+                recipes, many=True, context=context
+            ).data,
+            lambda context: RecipeSimpleReadSerializer(
+                recipes.values('id', 'name', 'image', 'cooking_time'),
+                many=True, context=context,
+            ).data,
+        )
+
+    def test_subscription(self):
+        authors = User.objects.order_by('id')
+        self.assertSameJSON(
+            lambda context: SubscribeSerializer(
+                authors, many=True, context=context
+            ).data,
+            lambda context: SubscribeReadSerializer(
+                authors.annotate(recipes_count=Count('recipes')),
+                many=True, context=context,
+            ).data,
+        )
+
+
+class RecipeFragmentMixinTests(SimpleTestCase):
+
+    def test_build_fragment_is_abstract(self):
+        class IncompleteSerializer(RecipeFragmentMixin,
+                                   serializers.BaseSerializer):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteSerializer()
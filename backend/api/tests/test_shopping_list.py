@@ -0,0 +1,199 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from api.tests.utils import (
+    TEST_DATABASES,
+    TemporaryMediaMixin,
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user,
+    get_token,
+)
+from foodgram_backend.constants import MAX_CART_QUANTITY
+from recipes.models import ShoppingListItem
+
+
+def build_json(shopping_list):
+    """Вместо PDF отдается JSON со строками списка покупок."""
+    return json.dumps(shopping_list, ensure_ascii=False).encode()
+
+
+@mock.patch('api.v1.pdf.build_shopping_list_pdf', build_json)
+class ShoppingListTests(TemporaryMediaMixin, APITestCase):
+    """Строки ShoppingListItem пересчитываются при каждом изменении
+    списка покупок и совпадают со скачанным списком."""
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('cook')
+        cls.author = create_user('author')
+        cls.tag = create_tag('dinner')
+        cls.flour = create_ingredient('Мука')
+        cls.sugar = create_ingredient('Сахар')
+        cls.eggs = create_ingredient('Яйца', 'шт')
+        cls.pancakes = create_recipe(
+            cls.author, 'Блины',
+            ingredients=[(cls.flour, 100), (cls.sugar, 20)],
+        )
+        cls.omelette = create_recipe(
+            cls.author, 'Омлет',
+            ingredients=[(cls.flour, 50), (cls.eggs, 2)],
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {get_token(self.user)}'
+        )
+
+    def write(self, method, url, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300, response.content)
+        return response
+
+    def add(self, recipe, **data):
+        self.write('post', f'/api/recipes/{recipe.id}/shopping_cart/', data)
+
+    def remove(self, recipe):
+        self.write('delete', f'/api/recipes/{recipe.id}/shopping_cart/')
+
+    def assertShoppingList(self, expected, user=None):
+        """expected — {(название, единица): количество}."""
+        user = user or self.user
+        self.assertEqual(
+            {
+                (item.ingredient.name, item.ingredient.measurement_unit):
+                    item.amount
+                for item in ShoppingListItem.objects.filter(
+                    user=user
+                ).select_related('ingredient')
+            },
+            expected,
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {get_token(user)}')
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        downloaded = json.loads(b''.join(response.streaming_content))
+        response.close()
+        self.assertEqual(
+            downloaded,
+            [
+                {'name': name, 'measurement_unit': unit, 'amount': amount}
+                for (name, unit), amount in sorted(expected.items())
+            ],
+        )
+
+    def test_add_to_cart(self):
+        self.add(self.pancakes)
+        self.assertShoppingList({('Мука', 'г'): 100, ('Сахар', 'г'): 20})
+        self.add(self.omelette)
+        self.assertShoppingList({
+            ('Мука', 'г'): 150, ('Сахар', 'г'): 20, ('Яйца', 'шт'): 2,
+        })
+
+    def test_add_with_quantity(self):
+        self.add(self.omelette, quantity=3)
+        self.assertShoppingList({('Мука', 'г'): 150, ('Яйца', 'шт'): 6})
+
+    def test_remove_from_cart(self):
+        self.add(self.pancakes)
+        self.add(self.omelette)
+        self.remove(self.pancakes)
+        self.assertShoppingList({('Мука', 'г'): 50, ('Яйца', 'шт'): 2})
+        self.remove(self.omelette)
+        self.assertShoppingList({})
+
+    def test_change_quantity(self):
+        self.add(self.pancakes)
+        self.add(self.omelette)
+        self.write('patch', '/api/recipes/shopping_cart/', [
+            {'id': self.pancakes.id, 'quantity': 2},
+            {'id': self.omelette.id, 'quantity': 3},
+        ])
+        self.assertShoppingList({
+            ('Мука', 'г'): 350, ('Сахар', 'г'): 40, ('Яйца', 'шт'): 6,
+        })
+
+    def test_recipe_update(self):
+        self.add(self.pancakes, quantity=2)
+        self.add(self.omelette)
+        reader = create_user('reader')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {get_token(reader)}'
+        )
+        self.add(self.pancakes)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {get_token(self.author)}'
+        )
+        self.write('patch', f'/api/recipes/{self.pancakes.id}/', {
+            'name': 'Блины',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'tags': [self.tag.id],
+            'ingredients': [
+                {'id': self.flour.id, 'amount': 200},
+                {'id': self.eggs.id, 'amount': 1},
+            ],
+        })
+        self.assertShoppingList({('Мука', 'г'): 450, ('Яйца', 'шт'): 4})
+        self.assertShoppingList(
+            {('Мука', 'г'): 200, ('Яйца', 'шт'): 1}, user=reader
+        )
+
+    def test_scaled_totals_above_smallint(self):
+        salt = create_ingredient('Соль')
+        recipes = [
+            create_recipe(self.author, ingredients=[(salt, 30000)])
+            for _ in range(2)
+        ]
+        for recipe in recipes:
+            self.add(recipe, quantity=MAX_CART_QUANTITY)
+        self.assertShoppingList(
+            {('Соль', 'г'): 2 * 30000 * MAX_CART_QUANTITY}
+        )
+
+    def test_quantity_endpoint(self):
+        self.add(self.pancakes)
+        response = self.write('patch', '/api/recipes/shopping_cart/', [
+            {'id': self.pancakes.id, 'quantity': 4},
+        ])
+        self.assertEqual(
+            response.json(), [{'id': self.pancakes.id, 'quantity': 4}]
+        )
+        self.assertEqual(
+            self.user.shopping_cart.get(recipe=self.pancakes).quantity, 4
+        )
+        self.assertShoppingList({('Мука', 'г'): 400, ('Сахар', 'г'): 80})
+
+    def test_quantity_endpoint_rejects_invalid_data(self):
+        self.add(self.pancakes)
+        url = '/api/recipes/shopping_cart/'
+        invalid = (
+            [{'id': self.pancakes.id, 'quantity': 0}],
+            [{'id': self.pancakes.id, 'quantity': MAX_CART_QUANTITY + 1}],
+            [{'id': self.pancakes.id}],
+            [
+                {'id': self.pancakes.id, 'quantity': 2},
+                {'id': self.pancakes.id, 'quantity': 3},
+            ],
+            # Рецепта нет в списке покупок.
+            [
+                {'id': self.pancakes.id, 'quantity': 2},
+                {'id': self.omelette.id, 'quantity': 2},
+            ],
+        )
+        for data in invalid:
+            with self.subTest(data=data):
+                response = self.client.patch(url, data, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertShoppingList({('Мука', 'г'): 100, ('Сахар', 'г'): 20})
+        self.client.credentials()
+        self.assertEqual(
+            self.client.patch(url, [], format='json').status_code, 401
+        )
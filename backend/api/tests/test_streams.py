@@ -0,0 +1,148 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TransactionTestCase
+
+from api.events import EVENT_FIELDS, RecipeEventBroker, recipe_event
+from api.tests.utils import (
+    TEST_DATABASES,
+    TemporaryMediaMixin,
+    create_recipe,
+    create_user,
+    get_token,
+)
+from api.v1.streams import SentIds, subscription_events
+from foodgram_backend.constants import RECIPE_EVENTS_PATH
+from recipes.models import Recipe
+from users.models import Subscribe
+
+
+class RaceBroker(RecipeEventBroker):
+    """Брокер без потока источника: сразу после подписки присылает
+    события events, как будто рецепты создавались во время чтения
+    пропущенных."""
+
+    def __init__(self, events):
+        super().__init__()
+        self.feed = 'test'
+        self.events = events
+
+    def subscribe(self, queue, authors):
+        super().subscribe(queue, authors)
+        for event in self.events:
+            self.dispatch(event)
+
+
+class SentIdsTests(SimpleTestCase):
+
+    def test_keeps_last_ids(self):
+        sent = SentIds(maxlen=3)
+        for pk in (5, 2, 9, 7):
+            sent.add(pk)
+        self.assertEqual([pk in sent for pk in (5, 2, 9, 7)],
+                         [False, True, True, True])
+        self.assertEqual(len(sent.ids), 3)
+
+
+class SubscriptionEventsTests(TemporaryMediaMixin, TransactionTestCase):
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        self.reader = create_user('reader')
+        self.author = create_user('author')
+        Subscribe.objects.create(user=self.reader, author=self.author)
+        self.recipes = [create_recipe(self.author) for _ in range(3)]
+
+    def request(self, method='GET', headers=(), query='', stop_after=None):
+        """Выполняет запрос к ASGI-приложению. Клиент отключается,
+        когда получит событие с id stop_after."""
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': RECIPE_EVENTS_PATH,
+            'query_string': query.encode(),
+            'headers': [
+                (name.encode(), value.encode()) for name, value in headers
+            ],
+        }
+        messages = []
+
+        async def run():
+            done = asyncio.Event()
+
+            async def receive():
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+                body = message.get('body', b'')
+                if f'id: {stop_after}\n'.encode() in body:
+                    done.set()
+
+            await asyncio.wait_for(
+                subscription_events(scope, receive, send), timeout=5
+            )
+
+        asyncio.run(run())
+        status = messages[0]['status']
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        return status, body.decode()
+
+    def event_ids(self, body):
+        return [
+            json.loads(line[len('data: '):])['id']
+            for line in body.splitlines() if line.startswith('data: ')
+        ]
+
+    def test_method_not_allowed(self):
+        status, body = self.request(method='POST')
+        self.assertEqual(status, 405)
+        self.assertIn('POST', json.loads(body)['detail'])
+
+    def test_unauthorized(self):
+        for headers in ((), (('authorization', 'Token wrong'),)):
+            with self.subTest(headers=headers):
+                status, _ = self.request(headers=headers)
+                self.assertEqual(status, 401)
+
+    def test_replay_without_duplicates(self):
+        first, *missed = self.recipes
+        created = [
+            recipe_event(values) for values in
+            Recipe.objects.order_by('id').values(*EVENT_FIELDS)
+        ]
+        new = dict(created[-1], id=created[-1]['id'] + 1)
+        broker = RaceBroker(created[1:] + [new])
+        with mock.patch('api.v1.streams.broker', broker):
+            status, body = self.request(
+                headers=[('last-event-id', str(first.id))],
+                query=f'token={get_token(self.reader)}',
+                stop_after=new['id'],
+            )
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            self.event_ids(body),
+            [recipe.id for recipe in missed] + [new['id']],
+        )
+
+    def test_replay_sends_late_commits(self):
+        """Рецепт с меньшим id, зафиксированный после чтения пропущенных,
+        приходит из очереди, хотя рецепты с большим id уже отправлены."""
+        first, late, last = (recipe.id for recipe in self.recipes)
+        events = {
+            values['id']: recipe_event(values) for values in
+            Recipe.objects.order_by('id').values(*EVENT_FIELDS)
+        }
+        # Во время чтения пропущенных рецепт late еще не зафиксирован.
+        Recipe.objects.filter(id=late).delete()
+        broker = RaceBroker([events[last], events[late]])
+        with mock.patch('api.v1.streams.broker', broker):
+            status, body = self.request(
+                headers=[('last-event-id', str(first))],
+                query=f'token={get_token(self.reader)}',
+                stop_after=late,
+            )
+        self.assertEqual(status, 200)
+        self.assertEqual(self.event_ids(body), [last, late])
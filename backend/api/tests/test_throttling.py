@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.tests.utils import (
+    TEST_DATABASES,
+    TemporaryMediaMixin,
+    create_ingredient,
+    create_recipe,
+    create_user,
+    get_token,
+)
+from recipes.models import ShoppingCart
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {
+        'recipe_write': '2/minute',
+        'shopping_cart_download': '2/minute',
+    },
+})
+class ScopedFixedWindowThrottleTests(TemporaryMediaMixin, APITestCase):
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('cook')
+        cls.other = create_user('other')
+        recipe = create_recipe(
+            cls.user, ingredients=[(create_ingredient('Мука'), 100)]
+        )
+        ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        ShoppingCart.objects.create(user=cls.other, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {get_token(self.user)}'
+        )
+
+    def download(self):
+        return self.client.get('/api/recipes/download_shopping_cart/')
+
+    def test_requests_over_limit_get_429_with_retry_after(self):
+        for _ in range(2):
+            self.assertEqual(self.download().status_code, status.HTTP_200_OK)
+        response = self.download()
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        retry_after = int(response['Retry-After'])
+        self.assertGreaterEqual(retry_after, 1)
+        self.assertLessEqual(retry_after, 60)
+
+    def test_limit_is_per_user(self):
+        for _ in range(3):
+            self.download()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {get_token(self.other)}'
+        )
+        self.assertEqual(self.download().status_code, status.HTTP_200_OK)
+
+    def test_actions_without_scope_are_not_limited(self):
+        for _ in range(5):
+            response = self.client.get('/api/recipes/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_empty_rate_disables_limit(self):
+        rest_framework = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                'recipe_write': None, 'shopping_cart_download': None,
+            },
+        }
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            for _ in range(5):
+                self.assertEqual(
+                    self.download().status_code, status.HTTP_200_OK
+                )
@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, RecipeIngredients, Tag
+from users.models import User
+
+# Базы, к которым обращаются тесты с БД: при настроенных репликах
+# безопасные запросы API читают с них.
+TEST_DATABASES = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+
+
+class TemporaryMediaMixin:
+    """Файлы, которые создают тесты, пишутся во временные каталоги."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(
+            MEDIA_ROOT=f'{cls.media_root}/media',
+            PRIVATE_MEDIA_ROOT=f'{cls.media_root}/private_media',
+        )
+        cls.media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+def create_user(username, **kwargs):
+    return User.objects.create_user(
+        email=f'{username}@example.com',
+        username=username,
+        first_name=username.capitalize(),
+        last_name='Тестов',
+        password='password-123',
+        **kwargs,
+    )
+
+
+def get_token(user):
+    return Token.objects.get_or_create(user=user)[0].key
+
+
+def create_tag(slug, color='#E26C2D'):
+    return Tag.objects.create(name=slug, color=color, slug=slug)
+
+
+def create_ingredient(name, measurement_unit='г'):
+    return Ingredient.objects.create(
+        name=name, measurement_unit=measurement_unit
+    )
+
+
+def create_recipe(author, name='Рецепт', ingredients=(), tags=()):
+    """ingredients — пары (ингредиент, количество)."""
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text='Описание',
+        cooking_time=10,
+        image='recipes/images/test.png',
+    )
+    RecipeIngredients.objects.bulk_create(
+        RecipeIngredients(recipe=recipe, ingredient=ingredient, amount=amount)
+        for ingredient, amount in ingredients
+    )
+    recipe.tags.set(tags)
+    return recipe
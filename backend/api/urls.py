@@ -1,6 +1,8 @@
 from django.urls import include, path
 
+from .views import metrics_view
 
 urlpatterns = [
+    path('_metrics', metrics_view, name='metrics'),
     path('', include('api.v1.urls')),
 ]
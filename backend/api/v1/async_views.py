@@ -0,0 +1,62 @@
+from functools import wraps
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from api.diagnostics import profiler
+from api.metrics import get_current_metrics, instrument_connections
+from foodgram_backend.db import close_unusable_connections
+
+
+def async_view(view):
+    """Асинхронная обертка синхронной вьюхи DRF для работы под ASGI.
+
+    Django 3.2 выполняет синхронные вьюхи под ASGI в одном общем потоке,
+    поэтому медленный запрос задерживает все остальные. Обертка выполняет
+    вьюху и рендеринг ответа в пуле потоков, у каждого потока свое
+    соединение с БД, которое закрывается по правилам CONN_MAX_AGE.
+    При ASYNC_API_VIEWS=False (например, в тестах через override_settings)
+    вьюха выполняется в общем потоке, как обычная синхронная.
+    """
+
+    def run(request, *args, **kwargs):
+        close_old_connections()
+        close_unusable_connections()
+        try:
+            with instrument_connections(), profiler.profile_thread():
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    metrics = get_current_metrics()
+                    if metrics is not None:
+                        metrics.render_start = perf_counter()
+                    response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await sync_to_async(
+            run, thread_sensitive=not settings.ASYNC_API_VIEWS
+        )(request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_urlpatterns(urlpatterns):
+    """Оборачивает вьюхи маршрутов в async_view,
+    если включена настройка ASYNC_API_VIEWS."""
+    if not settings.ASYNC_API_VIEWS:
+        return urlpatterns
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_view(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        ) if isinstance(pattern, URLPattern) else pattern
+        for pattern in urlpatterns
+    ]
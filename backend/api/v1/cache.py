@@ -0,0 +1,194 @@
+import time
+from collections import namedtuple
+from hashlib import md5
+
+from django.core.cache import cache
+from django.db import transaction
+
+from foodgram_backend.constants import (
+    RECIPE_FRAGMENT_CACHE_TIMEOUT,
+    RECIPE_RESPONSE_CACHE_TIMEOUT,
+    USER_RELATIONS_CACHE_TIMEOUT,
+)
+from foodgram_backend.db import primary_reads
+from recipes.models import Favorites, ShoppingCart
+from users.models import Subscribe
+
+USER_RELATIONS_VERSION_KEY = 'user_relations_version:{}'
+USER_RELATIONS_KEY = 'user_relations:{}:{}'
+RECIPE_FRAGMENTS_VERSION_KEY = 'recipe_fragments_version'
+RECIPE_FRAGMENT_VERSION_KEY = 'recipe_fragment_version:{}'
+RECIPE_FRAGMENT_KEY = 'recipe_fragment:{}:{}:{}'
+RECIPE_RESPONSES_VERSION_KEY = 'recipe_responses_version'
+RECIPE_RESPONSE_KEY = 'recipe_response:{}:{}'
+
+UserRelations = namedtuple(
+    'UserRelations', ('favorited', 'in_shopping_cart', 'subscribed')
+)
+EMPTY_RELATIONS = UserRelations(frozenset(), frozenset(), frozenset())
+
+
+def load_user_relations(user_id):
+    """Загружает id избранных рецептов, рецептов в списке покупок
+    и авторов, на которых подписан пользователь, из кэша или из БД."""
+    key = USER_RELATIONS_KEY.format(
+        user_id, get_version(USER_RELATIONS_VERSION_KEY.format(user_id))
+    )
+    relations = cache.get(key)
+    if relations is None:
+        with primary_reads():
+            relations = load_user_relations_from_db(user_id)
+        cache.set(key, relations, USER_RELATIONS_CACHE_TIMEOUT)
+    return relations
+
+
+def load_user_relations_from_db(user_id):
+    return UserRelations(
+        frozenset(Favorites.objects.filter(
+            user_id=user_id).values_list('recipe_id', flat=True)),
+        frozenset(ShoppingCart.objects.filter(
+            user_id=user_id).values_list('recipe_id', flat=True)),
+        frozenset(Subscribe.objects.filter(
+            user_id=user_id).values_list('author_id', flat=True)),
+    )
+
+
+def get_user_relations(request):
+    """Возвращает связи пользователя запроса.
+    Загружаются не более одного раза за запрос."""
+    if request is None or not request.user.is_authenticated:
+        return EMPTY_RELATIONS
+    relations = getattr(request, '_user_relations', None)
+    if relations is None:
+        relations = load_user_relations(request.user.id)
+        request._user_relations = relations
+    return relations
+
+
+def invalidate_user_relations(user_id):
+    bump_versions([USER_RELATIONS_VERSION_KEY.format(user_id)])
+
+
+def new_version():
+    return time.time_ns()
+
+
+def get_versions(keys):
+    """Версии кэша по ключам. Отсутствующая или вытесненная версия
+    создается заново из текущего времени, поэтому не совпадает
+    ни с одной из прежних и старые записи не оживают."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = new_version()
+            cache.add(key, version, None)
+            versions[key] = cache.get(key, version)
+    return versions
+
+
+def get_version(key):
+    return get_versions([key])[key]
+
+
+def bump_versions(keys):
+    """Меняет версии после фиксации транзакции.
+
+    Версия читается до загрузки данных из БД, а меняется после
+    фиксации изменений. Запись, построенная по старым данным,
+    попадает под старую версию и больше не читается, даже если
+    сохранена в кэш после смены версии. Версия заменяется новым
+    значением, а не увеличивается, поэтому одновременные смены
+    не теряются."""
+    keys = list(keys)
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(
+            dict.fromkeys(keys, new_version()), None
+        ))
+
+
+def bump_recipe_fragments_version():
+    """Делает недействительными все закэшированные фрагменты рецептов
+    и ответы для анонимных пользователей."""
+    bump_versions([RECIPE_FRAGMENTS_VERSION_KEY, RECIPE_RESPONSES_VERSION_KEY])
+
+
+def get_recipe_fragments(recipes, build_fragments):
+    """Возвращает словарь {id рецепта: фрагмент} с общей для всех
+    пользователей частью представления рецептов.
+    Отсутствующие в кэше фрагменты строятся вызовом build_fragments,
+    который возвращает такой же словарь."""
+    version_keys = {
+        recipe.id: RECIPE_FRAGMENT_VERSION_KEY.format(recipe.id)
+        for recipe in recipes
+    }
+    versions = get_versions(
+        [RECIPE_FRAGMENTS_VERSION_KEY, *version_keys.values()]
+    )
+    keys = {
+        recipe.id: RECIPE_FRAGMENT_KEY.format(
+            versions[RECIPE_FRAGMENTS_VERSION_KEY], recipe.id,
+            versions[version_keys[recipe.id]],
+        )
+        for recipe in recipes
+    }
+    cached = cache.get_many(keys.values())
+    fragments = {}
+    missing = []
+    for recipe in recipes:
+        fragment = cached.get(keys[recipe.id])
+        if fragment is None:
+            missing.append(recipe)
+        else:
+            fragments[recipe.id] = fragment
+    if missing:
+        built = build_fragments(missing)
+        cache.set_many(
+            {keys[recipe_id]: fragment
+             for recipe_id, fragment in built.items()},
+            RECIPE_FRAGMENT_CACHE_TIMEOUT,
+        )
+        fragments.update(built)
+    return fragments
+
+
+def invalidate_recipe_fragments(recipe_ids):
+    """Сбрасывает фрагменты рецептов. Изменение любого рецепта
+    делает недействительными и все ответы для анонимных пользователей."""
+    keys = [
+        RECIPE_FRAGMENT_VERSION_KEY.format(recipe_id)
+        for recipe_id in recipe_ids
+    ]
+    if keys:
+        bump_versions(keys + [RECIPE_RESPONSES_VERSION_KEY])
+
+
+def get_recipe_response_key(request, action, view_kwargs, params,
+                            ignored_params=()):
+    """Ключ кэша ответа для анонимного пользователя.
+    Строится по нормализованным параметрам запроса: порядок и повторы
+    значений не важны, пустые значения и ignored_params отбрасываются.
+    Если в запросе есть другие параметры, возвращает None."""
+    query = request.query_params
+    if set(query) - set(params) - set(ignored_params):
+        return None
+    normalized = []
+    for name in params:
+        values = sorted(set(filter(None, query.getlist(name))))
+        if values:
+            normalized.append((name, values))
+    raw = repr([
+        request.scheme, request.get_host(), action,
+        sorted(view_kwargs.items()), normalized,
+    ])
+    return RECIPE_RESPONSE_KEY.format(
+        get_version(RECIPE_RESPONSES_VERSION_KEY),
+        md5(raw.encode()).hexdigest(),
+    )
+
+
+def get_recipe_response(key):
+    return cache.get(key)
+
+
+def set_recipe_response(key, data):
+    cache.set(key, data, RECIPE_RESPONSE_CACHE_TIMEOUT)
@@ -0,0 +1,69 @@
+from django.utils.translation import gettext_lazy as _
+from drf_extra_fields.fields import Base64FieldMixin, Base64ImageField
+from PIL import Image
+from rest_framework.fields import ImageField
+
+from foodgram_backend.constants import (
+    RECIPE_IMAGE_MAX_SIDE,
+    RECIPE_IMAGE_MAX_SIZE,
+)
+
+
+class LimitedImageField(ImageField):
+    """Картинка с ограничением размера файла и сторон. Проверки идут
+    до полной проверки картинки в ImageField: Pillow при открытии
+    читает только заголовок, пиксели не декодируются."""
+    default_error_messages = {
+        'max_size': _('Размер картинки не должен превышать {max_size} МБ.'),
+        'max_side': _('Ширина и высота картинки не должны превышать '
+                      '{max_side} пикселей.'),
+    }
+
+    def __init__(self, *args, max_size=RECIPE_IMAGE_MAX_SIZE,
+                 max_side=RECIPE_IMAGE_MAX_SIDE, **kwargs):
+        self.max_size = max_size
+        self.max_side = max_side
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        self.check_size(getattr(data, 'size', None))
+        self.check_side(data)
+        return super().to_internal_value(data)
+
+    def check_size(self, size):
+        if size is None:
+            self.fail('invalid_image')
+        if size > self.max_size:
+            self.fail('max_size', max_size=self.max_size // (1024 * 1024))
+
+    def check_side(self, file):
+        position = file.tell()
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            file.seek(position)
+        if max(width, height) > self.max_side:
+            self.fail('max_side', max_side=self.max_side)
+
+
+class RecipeImageField(Base64ImageField, LimitedImageField):
+    """Картинка рецепта: файл из multipart/form-data или, для обратной
+    совместимости, строка base64.
+
+    Base64FieldMixin декодирует строку в файл и передает его дальше
+    по MRO в LimitedImageField, поэтому ограничения проверяются
+    одинаково для обоих форматов. Размер строки base64 оценивается
+    заранее, чтобы не декодировать заведомо слишком большую картинку."""
+
+    def to_internal_value(self, data):
+        if data in self.EMPTY_VALUES:
+            return None
+        if isinstance(data, str):
+            encoded = data.split(';base64,')[-1]
+            self.check_size(len(encoded) * 3 // 4)
+            return super().to_internal_value(data)
+        # Файл из multipart передается мимо декодирования base64.
+        return super(Base64FieldMixin, self).to_internal_value(data)
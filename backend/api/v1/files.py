@@ -0,0 +1,62 @@
+import os
+import tempfile
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+
+from foodgram_backend.constants import PRIVATE_FILE_MAX_AGE
+
+
+def get_or_create_private_file(directory, name, build):
+    """Возвращает путь к файлу directory/name в PRIVATE_MEDIA_ROOT.
+    Если файла нет, он создается из байтов, которые возвращает build.
+    Имя файла должно зависеть от содержимого.
+
+    Остальные файлы каталога старше PRIVATE_FILE_MAX_AGE секунд
+    удаляются как устаревшие: более новые еще может отдавать nginx
+    или дописывать параллельный запрос."""
+    directory = os.path.join(settings.PRIVATE_MEDIA_ROOT, directory)
+    path = os.path.join(directory, name)
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(build())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    remove_old_files(directory, keep=path)
+    return path
+
+
+def remove_old_files(directory, keep):
+    expired = time.time() - PRIVATE_FILE_MAX_AGE
+    for entry in os.scandir(directory):
+        if entry.path == keep:
+            continue
+        try:
+            if entry.stat().st_mtime < expired:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def private_file_response(path, filename, content_type):
+    """Отдает файл из PRIVATE_MEDIA_ROOT как вложение.
+    При X_ACCEL_REDIRECT=True файл по внутреннему адресу отдает nginx,
+    а процесс Python только формирует заголовки."""
+    if settings.X_ACCEL_REDIRECT:
+        relative = os.path.relpath(path, settings.PRIVATE_MEDIA_ROOT)
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.PRIVATE_MEDIA_URL + quote(relative.replace(os.sep, '/'))
+        )
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
@@ -1,3 +1,4 @@
+from django.db.models import Q
 from django_filters import rest_framework as filters
 
 from recipes.models import Ingredient, Recipe, Tag
@@ -38,3 +39,19 @@ class RecipeFilter(filters.FilterSet):
     class Meta:
         model = Recipe
         fields = ('author', 'tags')
+
+
+class UserFilter(filters.FilterSet):
+    """Фильтр для модели User: поиск по началу username или email.
+    Поля уникальны, на PostgreSQL для них есть индексы
+    с varchar_pattern_ops, которые используются в LIKE 'префикс%'."""
+    search = filters.CharFilter(method='filter_search')
+
+    def filter_search(self, queryset, name, value):
+        return queryset.filter(
+            Q(username__startswith=value) | Q(email__startswith=value)
+        )
+
+    class Meta:
+        model = User
+        fields = ('search',)
@@ -0,0 +1,65 @@
+import json
+
+from django.conf import settings
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, JSONParser, MultiPartParser
+
+from .renderers import ORJSONRenderer, orjson
+
+
+class ORJSONParser(JSONParser):
+    """Парсер JSON на основе orjson.
+    Если orjson не установлен, работает как стандартный JSONParser."""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class ParsedData(dict):
+    """Данные запроса из JSON, к которым DRF добавляет файлы через
+    copy() и update(): из MultiValueDict берется по одному файлу на поле,
+    а не список."""
+
+    def copy(self):
+        return ParsedData(self)
+
+    def update(self, other=(), **kwargs):
+        if isinstance(other, MultiValueDict):
+            other = other.dict()
+        super().update(other, **kwargs)
+
+
+class MultiPartJSONParser(MultiPartParser):
+    """multipart/form-data, в котором поле data содержит тело запроса
+    в JSON, а остальные части — файлы: {"data": "{...}", "image": <файл>}.
+    Файлы попадают в данные под именами своих полей, поэтому сериализатор
+    получает тот же словарь, что и из JSON. Запросы без поля data
+    разбираются как обычный multipart."""
+    json_field = 'data'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        result = super().parse(stream, media_type, parser_context)
+        if self.json_field not in result.data:
+            return result
+        try:
+            data = orjson_loads(result.data[self.json_field])
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+        if not isinstance(data, dict):
+            raise ParseError('JSON parse error - ожидается объект')
+        return DataAndFiles(ParsedData(data), result.files)
+
+
+def orjson_loads(value):
+    if orjson is None:
+        return json.loads(value)
+    return orjson.loads(value)
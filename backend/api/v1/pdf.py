@@ -0,0 +1,73 @@
+import os
+from functools import lru_cache
+from hashlib import sha256
+from io import BytesIO
+
+from django.conf import settings
+from django.db.models import F
+
+from foodgram_backend.constants import PDF_FONT_FILE, PDF_FONT_NAME
+from recipes.models import ShoppingListItem
+from .files import get_or_create_private_file
+
+
+@lru_cache(maxsize=None)
+def register_font():
+    """Регистрирует шрифт с кириллицей один раз за процесс."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(
+        TTFont(PDF_FONT_NAME, os.path.join(settings.BASE_DIR, PDF_FONT_FILE))
+    )
+
+
+def build_shopping_list_pdf(shopping_list):
+    """Строит PDF со списком покупок.
+    reportlab загружается при первом вызове, а не при старте воркера:
+    он нужен только для скачивания списка покупок."""
+    from reportlab.pdfgen import canvas
+
+    register_font()
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer)
+    p.setFont(PDF_FONT_NAME, 12)
+    y = 750
+    for idx, ingredient in enumerate(shopping_list, start=1):
+        line = (
+            f"{idx}. {ingredient['name']} "
+            f"({ingredient['measurement_unit']}) - {ingredient['amount']}"
+        )
+        p.drawString(100, y, line)
+        y -= 20
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def get_shopping_list(user_id):
+    """Суммарное количество ингредиентов рецептов из списка покупок."""
+    items = ShoppingListItem.objects.filter(user_id=user_id).values(
+        'amount',
+        name=F('ingredient__name'),
+        measurement_unit=F('ingredient__measurement_unit'),
+    ).order_by('ingredient__name', 'ingredient__measurement_unit')
+    return [
+        {
+            'name': item['name'],
+            'measurement_unit': item['measurement_unit'],
+            'amount': item['amount']
+        } for item in items
+    ]
+
+
+def get_shopping_list_file(user_id):
+    """Путь к PDF со списком покупок пользователя.
+    Имя файла зависит от содержимого списка: пока список покупок
+    не изменился, PDF не строится заново."""
+    shopping_list = get_shopping_list(user_id)
+    digest = sha256(repr(shopping_list).encode()).hexdigest()
+    return get_or_create_private_file(
+        f'shopping_lists/{user_id}', f'{digest}.pdf',
+        lambda: build_shopping_list_pdf(shopping_list),
+    )
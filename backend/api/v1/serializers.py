@@ -1,20 +1,48 @@
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+
+from django.db.models import (
+    Manager,
+    OuterRef,
+    Subquery,
+    prefetch_related_objects,
+)
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound
 from rest_framework.validators import UniqueTogetherValidator
 
-from foodgram_backend.constants import MIN_COOKING_TIME
+from api.metrics import TimedSerializerMixin
+from foodgram_backend.constants import (
+    MAX_CART_QUANTITY,
+    MIN_CART_QUANTITY,
+    MIN_COOKING_TIME,
+)
+from foodgram_backend.db import primary_reads, replica_reads_active
 from recipes.models import (
     Favorites,
     Ingredient,
     Recipe,
     RecipeIngredients,
     ShoppingCart,
+    ShoppingListItem,
     Tag,
 )
+from recipes.shopping_list import refresh_recipe_shopping_lists
 from users.models import Subscribe, User
+from .cache import (
+    get_recipe_fragments,
+    get_user_relations,
+    invalidate_recipe_fragments,
+)
+from .fields import RecipeImageField
+
 
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """Список объектов с учетом времени сериализации в метриках."""
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для кастомной модели User."""
     is_subscribed = serializers.SerializerMethodField()
 
@@ -30,16 +58,15 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        return bool(
-            request and request.user.is_authenticated
-            and Subscribe.objects.filter(
-                user=request.user, author=obj
-            ).exists()
-        )
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in get_user_relations(
+            self.context.get('request')
+        ).subscribed
 
 
-class RecipeSimpleSerializer(serializers.ModelSerializer):
+class RecipeSimpleSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     """Сериализатор для списка рецептов без ингридиентов
     для отображения в подписках, списках покупок и в избранном."""
     name = serializers.CharField()
@@ -78,7 +105,10 @@ class SubscribeSerializer(UserSerializer):
         ).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj).count()
+        recipes_count = getattr(obj, 'recipes_count', None)
+        if recipes_count is None:
+            return Recipe.objects.filter(author=obj).count()
+        return recipes_count
 
 
 class SubscribeCreateSerializer(serializers.ModelSerializer):
@@ -131,7 +161,7 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
     """Сериализатор для списка покупок."""
     class Meta:
         model = ShoppingCart
-        fields = ('user', 'recipe')
+        fields = ('user', 'recipe', 'quantity')
 
     def validate(self, value):
         if ShoppingCart.objects.filter(
@@ -146,6 +176,14 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         return FavoriteAndShoppingCartResponseSerializer(instance).data
 
 
+class ShoppingCartQuantitySerializer(serializers.Serializer):
+    """Количество рецепта в списке покупок для массового изменения."""
+    id = serializers.IntegerField()
+    quantity = serializers.IntegerField(
+        min_value=MIN_CART_QUANTITY, max_value=MAX_CART_QUANTITY
+    )
+
+
 class FavoriteAndShoppingCartResponseSerializer(serializers.Serializer):
     """Сериализатор для выдачи данных для избранного и списка покупок."""
 
@@ -158,6 +196,7 @@ class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ('id', 'name', 'color', 'slug')
+        list_serializer_class = TimedListSerializer
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -165,6 +204,7 @@ class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit')
+        list_serializer_class = TimedListSerializer
 
 
 class RecipeIngredientsSerializer(serializers.ModelSerializer):
@@ -181,6 +221,20 @@ class RecipeIngredientsSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'name', 'measurement_unit')
 
 
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    """Сериализатор ингредиента в списке покупок."""
+    id = serializers.ReadOnlyField(source='ingredient_id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+        list_serializer_class = TimedListSerializer
+
+
 class RecipeIngredientsCreateSerializer(serializers.ModelSerializer):
     """Ингредиент и количество для создания рецепта."""
     id = serializers.PrimaryKeyRelatedField(
@@ -192,7 +246,81 @@ class RecipeIngredientsCreateSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+def get_image_url(name, request=None):
+    """URL изображения рецепта по имени файла, как у Base64ImageField."""
+    if not name:
+        return None
+    url = Recipe._meta.get_field('image').storage.url(str(name))
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class RecipeListSerializer(TimedSerializerMixin,
+                           serializers.ListSerializer):
+    """Список рецептов, собираемый из закэшированных фрагментов."""
+
+    def to_representation(self, data):
+        recipes = list(data.all() if isinstance(data, Manager) else data)
+        fragments = get_recipe_fragments(recipes, self.child.build_fragments)
+        return [
+            self.child.add_viewer_data(fragments[recipe.id])
+            for recipe in recipes if recipe.id in fragments
+        ]
+
+
+class RecipeFragmentMetaclass(ABCMeta, serializers.SerializerMetaclass):
+    """Метакласс сериализаторов с абстрактными методами."""
+
+
+class RecipeFragmentMixin(metaclass=RecipeFragmentMetaclass):
+    """Общая для всех пользователей часть представления рецепта
+    кэшируется, при выдаче в неё подставляются данные
+    текущего пользователя. Подкласс определяет build_fragment."""
+
+    def to_representation(self, instance):
+        fragments = get_recipe_fragments([instance], self.build_fragments)
+        if instance.id not in fragments:
+            raise NotFound
+        return self.add_viewer_data(fragments[instance.id])
+
+    def build_fragments(self, recipes):
+        if replica_reads_active():
+            # Фрагменты кэшируются надолго, поэтому строятся
+            # по данным основной базы, а не отстающей реплики.
+            with primary_reads():
+                recipes = list(Recipe.objects.select_related('author').filter(
+                    id__in=[recipe.id for recipe in recipes]
+                ))
+                return self.build_fragments(recipes)
+        prefetch_related_objects(
+            recipes, 'tags', 'recipe_ingredients__ingredient'
+        )
+        return {recipe.id: self.build_fragment(recipe) for recipe in recipes}
+
+    @abstractmethod
+    def build_fragment(self, recipe):
+        """Представление рецепта без данных пользователя: is_subscribed,
+        is_favorited и is_in_shopping_cart равны False, image — путь
+        без хоста. Рецепты переданы с автором, тэгами и ингредиентами."""
+
+    def add_viewer_data(self, fragment):
+        request = self.context.get('request')
+        relations = get_user_relations(request)
+        data = OrderedDict(fragment)
+        data['author'] = OrderedDict(fragment['author'])
+        data['author']['is_subscribed'] = (
+            data['author']['id'] in relations.subscribed
+        )
+        data['is_favorited'] = data['id'] in relations.favorited
+        data['is_in_shopping_cart'] = data['id'] in relations.in_shopping_cart
+        if request is not None and data['image']:
+            data['image'] = request.build_absolute_uri(data['image'])
+        return data
+
+
+class RecipeSerializer(TimedSerializerMixin, RecipeFragmentMixin,
+                       serializers.ModelSerializer):
     """Сериализатор для модели Recipe."""
     author = UserSerializer(read_only=True)
     tags = TagSerializer(many=True)
@@ -208,25 +336,178 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'author', 'tags', 'ingredients', 'is_favorited',
             'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time')
+        list_serializer_class = RecipeListSerializer
+
+    def build_fragment(self, recipe):
+        fragment = serializers.ModelSerializer.to_representation(self, recipe)
+        fragment['author']['is_subscribed'] = False
+        fragment['is_favorited'] = False
+        fragment['is_in_shopping_cart'] = False
+        fragment['image'] = get_image_url(recipe.image)
+        return fragment
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        return bool(
-            request and request.user.is_authenticated
-            and Favorites.objects.filter(
-                user=request.user, recipe=obj
-            ).exists()
-        )
+        return obj.id in get_user_relations(
+            self.context.get('request')
+        ).favorited
 
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        return bool(
-            request and request.user.is_authenticated
-            and ShoppingCart.objects.filter(
-                user=request.user, recipe=obj
-            ).exists()
+        return obj.id in get_user_relations(
+            self.context.get('request')
+        ).in_shopping_cart
+
+
+class RecipeSimpleReadSerializer(serializers.BaseSerializer):
+    """Облегчённый сериализатор только для чтения, выдающий то же,
+    что RecipeSimpleSerializer. Принимает рецепты или строки .values()."""
+
+    def to_representation(self, instance):
+        if isinstance(instance, dict):
+            return OrderedDict((
+                ('id', instance['id']),
+                ('name', instance['name']),
+                ('image', get_image_url(
+                    instance['image'], self.context.get('request')
+                )),
+                ('cooking_time', instance['cooking_time']),
+            ))
+        return OrderedDict((
+            ('id', instance.id),
+            ('name', instance.name),
+            ('image', get_image_url(
+                instance.image, self.context.get('request')
+            )),
+            ('cooking_time', instance.cooking_time),
+        ))
+
+
+class RecipeIngredientsReadSerializer(serializers.BaseSerializer):
+    """Облегчённый сериализатор только для чтения,
+    выдающий то же, что RecipeIngredientsSerializer."""
+
+    def to_representation(self, instance):
+        return OrderedDict((
+            ('id', instance.id),
+            ('name', instance.ingredient.name),
+            ('measurement_unit', instance.ingredient.measurement_unit),
+            ('amount', instance.amount),
+        ))
+
+
+class RecipeReadSerializer(TimedSerializerMixin, RecipeFragmentMixin,
+                           serializers.BaseSerializer):
+    """Облегчённый сериализатор только для чтения, выдающий то же,
+    что RecipeSerializer, без построения полей ModelSerializer."""
+
+    class Meta:
+        list_serializer_class = RecipeListSerializer
+
+    def build_fragment(self, recipe):
+        author = recipe.author
+        ingredients = RecipeIngredientsReadSerializer()
+        return OrderedDict((
+            ('id', recipe.id),
+            ('author', OrderedDict((
+                ('id', author.id),
+                ('email', author.email),
+                ('username', author.username),
+                ('first_name', author.first_name),
+                ('last_name', author.last_name),
+                ('is_subscribed', False),
+            ))),
+            ('tags', [
+                OrderedDict((
+                    ('id', tag.id),
+                    ('name', tag.name),
+                    ('color', tag.color),
+                    ('slug', tag.slug),
+                ))
+                for tag in recipe.tags.all()
+            ]),
+            ('ingredients', [
+                ingredients.to_representation(recipe_ingredient)
+                for recipe_ingredient in recipe.recipe_ingredients.all()
+            ]),
+            ('is_favorited', False),
+            ('is_in_shopping_cart', False),
+            ('name', recipe.name),
+            ('image', get_image_url(recipe.image)),
+            ('text', recipe.text),
+            ('cooking_time', recipe.cooking_time),
+        ))
+
+
+def get_recipes_limit(request):
+    """Значение параметра recipes_limit или None, если он не задан."""
+    if request is None:
+        return None
+    try:
+        recipes_limit = int(request.query_params.get('recipes_limit'))
+    except (TypeError, ValueError):
+        return None
+    return recipes_limit if recipes_limit >= 0 else None
+
+
+class SubscribeReadListSerializer(TimedSerializerMixin,
+                                  serializers.ListSerializer):
+    """Список подписок, рецепты всех авторов загружаются одним запросом."""
+
+    def to_representation(self, data):
+        authors = list(data.all() if isinstance(data, Manager) else data)
+        recipes = {author.id: [] for author in authors}
+        for recipe in self.child.get_recipes(authors):
+            recipes[recipe['author_id']].append(recipe)
+        return [
+            self.child.build(author, recipes[author.id])
+            for author in authors
+        ]
+
+
+class SubscribeReadSerializer(TimedSerializerMixin,
+                              serializers.BaseSerializer):
+    """Облегчённый сериализатор только для чтения,
+    выдающий то же, что SubscribeSerializer."""
+
+    class Meta:
+        list_serializer_class = SubscribeReadListSerializer
+
+    def get_recipes(self, authors):
+        recipes = Recipe.objects.filter(author__in=authors)
+        recipes_limit = get_recipes_limit(self.context.get('request'))
+        if recipes_limit is not None:
+            recipes = recipes.filter(id__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('id')[:recipes_limit]
+            ))
+        return recipes.values(
+            'id', 'name', 'image', 'cooking_time', 'author_id'
         )
 
+    def to_representation(self, instance):
+        return self.build(instance, self.get_recipes([instance]))
+
+    def build(self, author, recipes):
+        recipes_count = getattr(author, 'recipes_count', None)
+        if recipes_count is None:
+            recipes_count = author.recipes.count()
+        recipe_serializer = RecipeSimpleReadSerializer(context=self.context)
+        return OrderedDict((
+            ('id', author.id),
+            ('email', author.email),
+            ('username', author.username),
+            ('first_name', author.first_name),
+            ('last_name', author.last_name),
+            ('is_subscribed', author.id in get_user_relations(
+                self.context.get('request')
+            ).subscribed),
+            ('recipes', [
+                recipe_serializer.to_representation(recipe)
+                for recipe in recipes
+            ]),
+            ('recipes_count', recipes_count),
+        ))
+
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания и обновления рецепта."""
@@ -235,7 +516,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     tags = serializers.PrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True
     )
-    image = Base64ImageField()
+    image = RecipeImageField()
 
     class Meta:
         model = Recipe
@@ -254,6 +535,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             for amount in [ingredient['amount']]
         ]
         RecipeIngredients.objects.bulk_create(ingredients_list)
+        invalidate_recipe_fragments([recipe.id])
 
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
@@ -268,9 +550,15 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     def update(self, recipe, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        RecipeIngredients.objects.filter(recipe=recipe).delete()
+        recipe_ingredients = RecipeIngredients.objects.filter(recipe=recipe)
+        changed = set(
+            recipe_ingredients.values_list('ingredient_id', flat=True)
+        )
+        recipe_ingredients.delete()
         recipe.tags.set(tags)
         self.create_ingredients(ingredients, recipe)
+        changed.update(ingredient['id'].id for ingredient in ingredients)
+        refresh_recipe_shopping_lists(recipe.id, changed)
         return super().update(recipe, validated_data)
 
     def to_representation(self, instance):
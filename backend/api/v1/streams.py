@@ -0,0 +1,201 @@
+import asyncio
+import json
+from collections import deque
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework.authtoken.models import Token
+
+from api.events import EVENT_FIELDS, broker, recipe_event
+from foodgram_backend.constants import (
+    RECIPE_EVENTS_KEEPALIVE,
+    RECIPE_EVENTS_QUEUE_SIZE,
+    RECIPE_EVENTS_REPLAY_LIMIT,
+    RECIPE_EVENTS_RETRY,
+    RECIPE_EVENTS_SUBSCRIPTIONS_REFRESH,
+)
+from recipes.models import Recipe
+from users.models import Subscribe
+
+
+def database(func):
+    """Выполняет запрос к БД в пуле потоков, не занимая цикл событий."""
+
+    def run(*args):
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+@database
+def get_user_id(key):
+    return Token.objects.filter(
+        key=key, user__is_active=True
+    ).values_list('user_id', flat=True).first()
+
+
+@database
+def get_authors(user_id):
+    return set(
+        Subscribe.objects.filter(user_id=user_id).values_list(
+            'author_id', flat=True
+        )
+    )
+
+
+@database
+def get_missed_events(authors, last_id):
+    return [
+        recipe_event(values) for values in Recipe.objects.filter(
+            author_id__in=authors, id__gt=last_id
+        ).order_by('id').values(*EVENT_FIELDS)[:RECIPE_EVENTS_REPLAY_LIMIT]
+    ]
+
+
+class SentIds:
+    """Последние maxlen отправленных id. В отличие от наибольшего
+    отправленного id не отбрасывает рецепты, транзакции которых
+    зафиксированы не в порядке id."""
+
+    def __init__(self, maxlen):
+        self.ids = set()
+        self.order = deque(maxlen=maxlen)
+
+    def add(self, pk):
+        if len(self.order) == self.order.maxlen:
+            self.ids.discard(self.order[0])
+        self.order.append(pk)
+        self.ids.add(pk)
+
+    def __contains__(self, pk):
+        return pk in self.ids
+
+
+def format_event(event):
+    return (
+        f'id: {event["id"]}\nevent: recipe\n'
+        f'data: {json.dumps(event, ensure_ascii=False)}\n\n'
+    ).encode()
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def recipe_events(user_id, last_id, disconnected):
+    """Асинхронный генератор сообщений SSE о новых рецептах авторов,
+    на которых подписан пользователь. Подписки перечитываются раз
+    в RECIPE_EVENTS_SUBSCRIPTIONS_REFRESH секунд, при простое
+    отправляется комментарий, чтобы прокси не закрыли соединение.
+
+    Очередь подписывается до чтения пропущенных рецептов, поэтому
+    рецепт, созданный во время чтения, может прийти и из базы,
+    и из очереди: события из очереди с уже отправленным id
+    пропускаются. Повтор возможен только для событий, попавших
+    в очередь за время чтения, поэтому хватает последних
+    RECIPE_EVENTS_REPLAY_LIMIT + RECIPE_EVENTS_QUEUE_SIZE id."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(RECIPE_EVENTS_QUEUE_SIZE)
+    authors = await get_authors(user_id)
+    broker.subscribe(queue, authors)
+    refresh_at = loop.time() + RECIPE_EVENTS_SUBSCRIPTIONS_REFRESH
+    try:
+        yield f'retry: {RECIPE_EVENTS_RETRY}\n\n'.encode()
+        sent = SentIds(RECIPE_EVENTS_REPLAY_LIMIT + RECIPE_EVENTS_QUEUE_SIZE)
+        if last_id is not None:
+            for event in await get_missed_events(authors, last_id):
+                sent.add(event['id'])
+                yield format_event(event)
+        while not disconnected.done():
+            get = asyncio.ensure_future(queue.get())
+            await asyncio.wait(
+                {get, disconnected},
+                timeout=RECIPE_EVENTS_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if get.done():
+                event = get.result()
+                if event['id'] not in sent:
+                    sent.add(event['id'])
+                    yield format_event(event)
+            else:
+                get.cancel()
+                if not disconnected.done():
+                    yield b': ping\n\n'
+            if loop.time() >= refresh_at:
+                authors = await get_authors(user_id)
+                broker.subscribe(queue, authors)
+                refresh_at = loop.time() + RECIPE_EVENTS_SUBSCRIPTIONS_REFRESH
+    finally:
+        broker.unsubscribe(queue)
+
+
+async def send_json(send, status, data):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps(data, ensure_ascii=False).encode(),
+    })
+
+
+async def subscription_events(scope, receive, send):
+    """ASGI-приложение для GET /api/users/subscriptions/events/:
+    поток Server-Sent Events о новых рецептах авторов из подписок
+    вместо опроса списка рецептов.
+
+    Токен передается в заголовке Authorization или, так как EventSource
+    в браузере не умеет задавать заголовки, в параметре token.
+    После переподключения рецепты, пропущенные после Last-Event-ID
+    (или параметра last_event_id), отправляются в начале потока.
+    """
+    if scope['method'] != 'GET':
+        return await send_json(
+            send, 405, {'detail': f'Метод "{scope["method"]}" не разрешен.'}
+        )
+    headers = dict(scope['headers'])
+    query = parse_qs(scope['query_string'].decode())
+    keyword, _, key = headers.get(b'authorization', b'').decode().partition(
+        ' '
+    )
+    if keyword != 'Token':
+        key = query.get('token', [''])[0]
+    user_id = await get_user_id(key) if key else None
+    if user_id is None:
+        return await send_json(
+            send, 401, {'detail': 'Недопустимый токен.'}
+        )
+    last_id = headers.get(b'last-event-id', b'').decode() or query.get(
+        'last_event_id', [''])[0]
+    last_id = int(last_id) if last_id.isdigit() else None
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache, private'),
+            # nginx не буферизует ответ и сразу отдает события клиенту.
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    events = recipe_events(user_id, last_id, disconnected)
+    try:
+        async for message in events:
+            await send({
+                'type': 'http.response.body',
+                'body': message,
+                'more_body': True,
+            })
+    finally:
+        await events.aclose()
+        disconnected.cancel()
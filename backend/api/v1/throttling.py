@@ -0,0 +1,65 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class ScopedFixedWindowThrottle(SimpleRateThrottle):
+    """Ограничение частоты запросов по областям с фиксированным окном.
+
+    Область задается во вьюсете атрибутом throttle_scope: строкой
+    или словарем {действие: область}; частота области — в настройке
+    DEFAULT_THROTTLE_RATES. Действия без области не ограничиваются.
+    Счетчик окна хранится в кэше и увеличивается атомарным incr,
+    а не перезаписью списка времен запросов, как в ScopedRateThrottle.
+    """
+    cache_format = 'throttle:{scope}:{ident}:{window}'
+
+    def __init__(self):
+        # Частота зависит от действия и определяется в allow_request.
+        pass
+
+    def get_rate(self):
+        # Частоты читаются при каждом запросе, а не при импорте,
+        # чтобы их можно было изменить через override_settings.
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f'Не задана частота для области "{self.scope}".'
+            )
+
+    def get_view_scope(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if isinstance(scope, dict):
+            return scope.get(getattr(view, 'action', None))
+        return scope
+
+    def allow_request(self, request, view):
+        self.scope = self.get_view_scope(view)
+        if self.scope is None:
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_end = (window + 1) * self.duration
+        key = self.cache_format.format(
+            scope=self.scope, ident=ident, window=window
+        )
+        self.cache.add(key, 0, self.duration)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            # Ключ вытеснен из кэша между add и incr.
+            self.cache.set(key, 1, self.duration)
+            count = 1
+        return count <= self.num_requests
+
+    def wait(self):
+        return self.window_end - self.now
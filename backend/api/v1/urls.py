@@ -1,9 +1,11 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import async_urlpatterns
 from .views import (
     IngredientViewSet,
     RecipeViewSet,
+    ShoppingListViewSet,
     SubscribeListViewSet,
     SubscribeViewSet,
     TagViewSet,
@@ -18,15 +20,20 @@ router_v1.register('ingredients', IngredientViewSet, basename='ingredients')
 
 subscribe_url = [
     path('users/subscriptions/',
-         SubscribeListViewSet.as_view({'get': 'list'})),
+         SubscribeListViewSet.as_view({'get': 'list'}),
+         name='subscriptions'),
     path('users/<int:user_id>/subscribe/',
-         SubscribeViewSet.as_view()),
+         SubscribeViewSet.as_view(),
+         name='subscribe'),
+    path('shopping_list/',
+         ShoppingListViewSet.as_view({'get': 'list'}),
+         name='shopping_list'),
 ]
 
 
 urlpatterns = [
-    path('', include(subscribe_url)),
-    path('', include(router_v1.urls)),
+    path('', include(async_urlpatterns(subscribe_url))),
+    path('', include(async_urlpatterns(router_v1.urls))),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
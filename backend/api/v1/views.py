@@ -1,54 +1,175 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as BaseUserViewSet
 from rest_framework import mixins, status, views, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import (
+    SAFE_METHODS,
+    AllowAny,
+    IsAuthenticated,
+)
 from rest_framework.response import Response
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
-from io import BytesIO
 
-from foodgram_backend.constants import FILE_NAME
+from api.tasks import schedule_shopping_list_render
+from foodgram_backend.constants import ANONYMOUS_RESPONSE_MAX_AGE, FILE_NAME
+from foodgram_backend.db import (
+    allow_replica_reads,
+    is_pinned_to_primary,
+    primary_reads,
+)
+from recipes.deletion import delete_recipes, delete_users
 from recipes.models import (
     Favorites,
     Ingredient,
     Recipe,
-    RecipeIngredients,
     ShoppingCart,
+    ShoppingListItem,
     Tag,
 )
+from recipes.shopping_list import set_cart_quantities
+from recommendations.models import AlsoLikedRecipe, SimilarRecipe
 from users.models import Subscribe, User
-from .filters import IngredientFilter, RecipeFilter
+from .cache import (
+    get_recipe_response,
+    get_recipe_response_key,
+    set_recipe_response,
+)
+from .files import private_file_response
+from .filters import IngredientFilter, RecipeFilter, UserFilter
+from .pdf import get_shopping_list_file
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (
     IngredientSerializer,
     RecipeCreateSerializer,
-    RecipeSerializer,
+    RecipeReadSerializer,
+    RecipeSimpleSerializer,
     SubscribeCreateSerializer,
-    SubscribeSerializer,
+    SubscribeReadSerializer,
     TagSerializer,
     FavoriteSerializer,
+    ShoppingCartQuantitySerializer,
     ShoppingCartSerializer,
+    ShoppingListItemSerializer,
 )
 
 
-pdfmetrics.registerFont(TTFont('PFDFont', 'pfd.ttf'))
+class ReplicaReadMixin:
+    """Чтения в безопасных запросах выполняются на репликах БД,
+    если они настроены. Аутентификация и проверка прав идут по основной
+    базе, чтобы только что выданный токен сразу работал. Пользователь,
+    недавно изменявший данные, читает с основной базы."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with primary_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in SAFE_METHODS
+            and not is_pinned_to_primary(request.user)
+        ):
+            allow_replica_reads()
+
+
+class AnonymousCacheMixin:
+    """Ответы list и retrieve для анонимных пользователей не зависят
+    от пользователя и кэшируются целиком по нормализованным параметрам.
+    Кэш сбрасывается при изменении любого рецепта.
+    Ответы отдаются с Vary: Accept, Authorization, чтобы промежуточные
+    кэши не смешивали ответы анонимных и авторизованных пользователей.
+    Ответ анонимному пользователю разрешено кэшировать
+    ANONYMOUS_RESPONSE_MAX_AGE секунд (микрокэш nginx),
+    ответ авторизованному — только в браузере.
+    Без общего кэша (ANONYMOUS_RESPONSE_CACHE) ответы не кэшируются."""
+    anonymous_cache_params = ()
+    anonymous_cache_ignored_params = ()
 
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
 
-class UserViewSet(BaseUserViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if (
+            not settings.ANONYMOUS_RESPONSE_CACHE
+            or request.user.is_authenticated
+            or request.accepted_renderer.format != 'json'
+        ):
+            return handler(request, *args, **kwargs)
+        key = get_recipe_response_key(
+            request, self.action, kwargs, self.anonymous_cache_params,
+            self.anonymous_cache_ignored_params,
+        )
+        if key is None:
+            return handler(request, *args, **kwargs)
+        data = get_recipe_response(key)
+        if data is not None:
+            return Response(data)
+        # Кэшируемый ответ строится по основной базе:
+        # отстающая реплика могла еще не получить изменение,
+        # после которого сменилась версия кэша.
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_recipe_response(key, response.data)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self.action not in ('list', 'retrieve'):
+            return response
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True)
+        elif response.status_code == status.HTTP_200_OK:
+            patch_cache_control(
+                response, public=True, max_age=ANONYMOUS_RESPONSE_MAX_AGE
+            )
+        return response
+
+
+class UserViewSet(ReplicaReadMixin, BaseUserViewSet):
     """Вьюсет кастомного пользователя, унаследованный от djoser."""
-    queryset = User.objects.all()
+    queryset = User.objects.order_by('id')
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = UserFilter
+    query_budget = {'list': 3, 'retrieve': 2, 'me': 4}
+
+    def get_queryset(self):
+        """Для просмотра выбираются только сериализуемые поля,
+        подписка на пользователя проверяется подзапросом EXISTS."""
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        queryset = queryset.only(*(
+            field for field in self.get_serializer_class().Meta.fields
+            if field != 'is_subscribed'
+        ))
+        if self.request.user.is_authenticated:
+            queryset = queryset.annotate(is_subscribed=Exists(
+                Subscribe.objects.filter(
+                    user=self.request.user, author=OuterRef('pk')
+                )
+            ))
+        return queryset
 
     def get_permissions(self):
         if self.action == 'me':
             return (IsAuthenticated(),)
         return super().get_permissions()
 
+    def perform_destroy(self, instance):
+        delete_users([instance.pk])
+
 
 class SubscribeViewSet(views.APIView):
     """Cоздание и удаление подписки."""
@@ -77,27 +198,68 @@ class SubscribeViewSet(views.APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class SubscribeListViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class SubscribeListViewSet(ReplicaReadMixin, mixins.ListModelMixin,
+                           viewsets.GenericViewSet):
     """Просмотр подписок."""
-    serializer_class = SubscribeSerializer
+    serializer_class = SubscribeReadSerializer
     permission_classes = (IsAuthenticated,)
+    query_budget = 7
 
     def get_queryset(self):
-        return User.objects.filter(subscribing__user=self.request.user)
+        return User.objects.filter(
+            subscribing__user=self.request.user
+        ).annotate(recipes_count=Count('recipes'))
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class ShoppingListViewSet(ReplicaReadMixin, mixins.ListModelMixin,
+                          viewsets.GenericViewSet):
+    """Суммарный список ингредиентов из списка покупок."""
+    serializer_class = ShoppingListItemSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = None
+    query_budget = 2
+
+    def get_queryset(self):
+        return ShoppingListItem.objects.filter(
+            user=self.request.user
+        ).select_related('ingredient').order_by(
+            'ingredient__name', 'ingredient__measurement_unit'
+        )
+
+
+class RecipeViewSet(AnonymousCacheMixin, ReplicaReadMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет для рецептов."""
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.select_related('author')
     permission_classes = (IsAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    anonymous_cache_params = ('page', 'limit', 'tags', 'author')
+    # Для анонимного пользователя эти фильтры ничего не меняют.
+    anonymous_cache_ignored_params = ('is_favorited', 'is_in_shopping_cart')
+    # С репликами фрагменты при промахе кэша строятся по рецептам,
+    # перечитанным с основной базы, — на один запрос больше.
+    query_budget = {
+        'list': 10, 'retrieve': 8, 'download_shopping_cart_pdf': 2,
+        'similar': 2,
+        'also_liked': 2,
+    }
+    # Создание и изменение декодируют изображение, PDF строится reportlab.
+    throttle_scope = {
+        'create': 'recipe_write',
+        'update': 'recipe_write',
+        'partial_update': 'recipe_write',
+        'download_shopping_cart_pdf': 'shopping_cart_download',
+    }
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
-            return RecipeSerializer
+            return RecipeReadSerializer
         return RecipeCreateSerializer
 
+    def perform_destroy(self, instance):
+        delete_recipes([instance.pk])
+
     @action(
         detail=True,
         methods=['post'],
@@ -135,10 +297,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_name='shopping_cart',
     )
     def shopping_cart(self, request, pk):
-        """Добавление и удаление рецепта в список покупок."""
-        serializer = ShoppingCartSerializer(
-            data={'user': request.user.pk, 'recipe': pk}
-        )
+        """Добавление и удаление рецепта в список покупок.
+        Необязательное поле quantity — сколько раз приготовить рецепт."""
+        data = {'user': request.user.pk, 'recipe': pk}
+        if 'quantity' in request.data:
+            data['quantity'] = request.data['quantity']
+        serializer = ShoppingCartSerializer(data=data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -156,6 +320,79 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path='similar',
+        url_name='similar',
+    )
+    def similar(self, request, pk):
+        """Похожие рецепты из таблицы, которую заполняет
+        команда build_similar_recipes."""
+        return self.neighbors_response(request, pk, SimilarRecipe)
+
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path='also_liked',
+        url_name='also_liked',
+    )
+    def also_liked(self, request, pk):
+        """Рецепты, которые добавляют в избранное вместе с данным,
+        из таблицы, которую заполняет команда build_also_liked."""
+        return self.neighbors_response(request, pk, AlsoLikedRecipe)
+
+    def neighbors_response(self, request, pk, model):
+        recipes = [
+            item.similar for item in model.objects.filter(
+                recipe_id=pk
+            ).select_related('similar').order_by('-score')
+        ]
+        if not recipes:
+            get_object_or_404(Recipe, id=pk)
+        return Response(RecipeSimpleSerializer(
+            recipes, many=True, context={'request': request}
+        ).data)
+
+    @action(
+        detail=False,
+        methods=['patch'],
+        permission_classes=[IsAuthenticated],
+        url_path='shopping_cart',
+        url_name='shopping_cart_quantities',
+    )
+    def shopping_cart_quantities(self, request):
+        """Изменение количества у нескольких рецептов списка покупок
+        одним запросом: [{"id": <id рецепта>, "quantity": <количество>}]."""
+        serializer = ShoppingCartQuantitySerializer(
+            data=request.data, many=True
+        )
+        serializer.is_valid(raise_exception=True)
+        quantities = {
+            item['id']: item['quantity']
+            for item in serializer.validated_data
+        }
+        if len(quantities) != len(serializer.validated_data):
+            return Response(
+                {'errors': 'Рецепты должны быть уникальными!'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        entries = list(ShoppingCart.objects.filter(
+            user=request.user, recipe_id__in=quantities
+        ))
+        missing = set(quantities) - {entry.recipe_id for entry in entries}
+        if missing:
+            return Response(
+                {'errors': 'Рецептов нет в списке покупок: '
+                           f'{", ".join(map(str, sorted(missing)))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        for entry in entries:
+            entry.quantity = quantities[entry.recipe_id]
+        set_cart_quantities(request.user.id, entries)
+        schedule_shopping_list_render(request.user.id)
+        return Response(serializer.data)
+
     @action(
         detail=False,
         methods=['get'],
@@ -165,49 +402,20 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def download_shopping_cart_pdf(self, request):
         """Скачивает список покупок в формате pdf."""
-        ingredients = (
-            RecipeIngredients.objects.filter(
-                recipe__shopping_cart__user=request.user
-            ).values(
-                'ingredient__name',
-                'ingredient__measurement_unit',
-            )
-        ).annotate(amount_sum=Sum('amount'))
-        shopping_list = [
-            {
-                'name': ingredient['ingredient__name'],
-                'measurement_unit': ingredient['ingredient__measurement_unit'],
-                'amount': ingredient['amount_sum']
-            } for ingredient in ingredients
-        ]
-        buffer = BytesIO()
-        p = canvas.Canvas(buffer)
-        p.setFont('PFDFont', 12)
-        y = 750
-        for idx, ingredient in enumerate(shopping_list, start=1):
-            line = (
-                f"{idx}. {ingredient['name']} "
-                f"({ingredient['measurement_unit']}) - {ingredient['amount']}"
-            )
-            p.drawString(100, y, line)
-            y -= 20
-        p.showPage()
-        p.save()
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename={FILE_NAME}'
-        return response
+        path = get_shopping_list_file(request.user.id)
+        return private_file_response(path, FILE_NAME, 'application/pdf')
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет тэгов."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
+    query_budget = 2
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет ингредиентов."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
@@ -215,3 +423,4 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
     pagination_class = None
+    query_budget = 2
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+
+from .metrics import registry
+
+
+def metrics_view(request):
+    """Метрики запросов в текстовом формате Prometheus. Доступны
+    персоналу и адресам из METRICS_ALLOWED_IPS, снаружи путь
+    закрыт в nginx."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not (
+        request.user.is_staff
+        or request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -4,4 +4,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api.v1.streams import subscription_events  # noqa: E402
+from foodgram_backend.constants import RECIPE_EVENTS_PATH  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """Поток событий SSE обслуживается напрямую: Django 3.2
+    не умеет отдавать под ASGI асинхронный потоковый ответ."""
+    if scope['type'] == 'http' and scope['path'] == RECIPE_EVENTS_PATH:
+        return await subscription_events(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -9,3 +9,31 @@ MIN_INGREDIENTS = 1
 MAX_INGREDIENTS = 32000
 PAGE_SIZE = 6
 FILE_NAME = 'shopping-list.pdf'
+USER_RELATIONS_CACHE_TIMEOUT = 60 * 60
+RECIPE_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+RECIPE_RESPONSE_CACHE_TIMEOUT = 60 * 10
+ANONYMOUS_RESPONSE_MAX_AGE = 5
+PDF_FONT_NAME = 'PFDFont'
+PDF_FONT_FILE = 'pfd.ttf'
+MAX_JOB_STATUS_LENGTH = 10
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10
+JOB_MAX_RETRY_DELAY = 60 * 60
+JOB_STALE_TIMEOUT = 60 * 10
+JOB_STATS_WINDOW = 1000
+SHOPPING_LIST_RENDER_DELAY = 5
+PRIVATE_FILE_MAX_AGE = 60 * 60
+DELETE_CHUNK_SIZE = 1000
+MAX_IMPORT_SOURCE_LENGTH = 1024
+MIN_CART_QUANTITY = 1
+MAX_CART_QUANTITY = 100
+RECIPE_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+RECIPE_IMAGE_MAX_SIDE = 6000
+RECIPE_EVENTS_CHANNEL = 'foodgram_new_recipes'
+RECIPE_EVENTS_PATH = '/api/users/subscriptions/events/'
+RECIPE_EVENTS_POLL_INTERVAL = 2
+RECIPE_EVENTS_KEEPALIVE = 15
+RECIPE_EVENTS_SUBSCRIPTIONS_REFRESH = 60
+RECIPE_EVENTS_REPLAY_LIMIT = 50
+RECIPE_EVENTS_QUEUE_SIZE = 100
+RECIPE_EVENTS_RETRY = 5000
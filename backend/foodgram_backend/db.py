@@ -0,0 +1,99 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY_PIN_KEY = 'db_primary_pin:{}'
+
+# Реплика, с которой читает текущий запрос, или None — основная база.
+_replica = ContextVar('replica', default=None)
+
+
+def choose_replica():
+    if settings.DATABASE_REPLICAS:
+        return random.choice(settings.DATABASE_REPLICAS)
+    return None
+
+
+@contextmanager
+def replica_reads():
+    """Направляет чтения внутри блока на одну из реплик,
+    если они настроены."""
+    token = _replica.set(_replica.get() or choose_replica())
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def allow_replica_reads():
+    """Включает чтение с реплик до выхода из ближайшего блока
+    replica_reads() или primary_reads(). Реплика выбирается один раз:
+    все чтения запроса идут на нее и видят согласованные данные."""
+    _replica.set(choose_replica())
+
+
+@contextmanager
+def primary_reads():
+    """Направляет чтения внутри блока на основную базу.
+    Нужно для данных, которые кэшируются надолго."""
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def replica_reads_active():
+    return _replica.get() is not None
+
+
+def pin_user_to_primary(user_id):
+    """После записи пользователь на время DB_REPLICA_STICKY_SECONDS
+    читает с основной базы и видит свои изменения,
+    даже если реплики от неё отстают."""
+    if settings.DATABASE_REPLICAS:
+        cache.set(
+            PRIMARY_PIN_KEY.format(user_id), True,
+            settings.DB_REPLICA_STICKY_SECONDS
+        )
+
+
+def is_pinned_to_primary(user):
+    if not settings.DATABASE_REPLICAS or not user.is_authenticated:
+        return False
+    return bool(cache.get(PRIMARY_PIN_KEY.format(user.id)))
+
+
+class ReplicaRouter:
+    """Роутер БД: чтения внутри replica_reads() идут на выбранную для
+    запроса реплику, все остальные запросы — на основную базу."""
+
+    def db_for_read(self, model, **hints):
+        return _replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def close_unusable_connections(**kwargs):
+    """Закрывает разорванные постоянные соединения текущего потока,
+    чтобы запрос открыл новое вместо ошибки на первом SQL-запросе."""
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and not connection.in_atomic_block
+            and not connection.is_usable()
+        ):
+            connection.close()
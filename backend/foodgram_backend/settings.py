@@ -11,6 +11,23 @@ DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '127.0.0.1,localhost').split(',')
 
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+# Кроме персонала, /api/_metrics доступен только с этих адресов.
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
+
+ASYNC_API_VIEWS = os.getenv('ASYNC_API_VIEWS', 'False') == 'True'
+
+# Диагностика: SQL-запросы дольше SLOW_QUERY_MS миллисекунд пишутся
+# в журнал, доля PROFILER_SAMPLE_RATE запросов профилируется с шагом
+# PROFILER_INTERVAL_MS, стеки сохраняются в PROFILER_OUTPUT_DIR.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 0))
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0))
+PROFILER_INTERVAL_MS = float(os.getenv('PROFILER_INTERVAL_MS', 5))
+PROFILER_OUTPUT_DIR = os.getenv('PROFILER_OUTPUT_DIR', BASE_DIR / 'profiles')
+
+# Постановка фоновых задач в очередь; выполняет их команда run_worker.
+JOBS_ENABLED = os.getenv('JOBS_ENABLED', 'False') == 'True'
+
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -27,9 +44,14 @@ INSTALLED_APPS = [
     'api',
     'recipes',
     'users',
+    'jobs',
+    'recommendations',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.DiagnosticsMiddleware',
+    'api.middleware.ReplicaStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,14 +81,34 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram_backend.wsgi.application'
 
+ASGI_APPLICATION = 'foodgram_backend.asgi.application'
+
+
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', 'True') == 'True'
+
+# В режиме pgbouncer (пул транзакций) серверные курсоры не работают.
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'False') == 'True'
+
+# Время, в течение которого пользователь после записи читает
+# с основной базы, а не с реплик.
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 5))
 
 if os.getenv('SQLITE', 'False') == 'True':
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': os.getenv('SQLITE_DB', 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
         }
     }
+    if os.getenv('SQLITE_REPLICA_DB'):
+        DATABASES['replica_1'] = {
+            **DATABASES['default'],
+            'NAME': os.getenv('SQLITE_REPLICA_DB'),
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
     DATABASES = {
         'default': {
@@ -75,10 +117,48 @@ else:
             'USER': os.getenv('POSTGRES_USER', 'django'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', ''),
-            'PORT': os.getenv('DB_PORT', 5432)
+            'PORT': os.getenv('DB_PORT', 5432),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'DISABLE_SERVER_SIDE_CURSORS': DB_PGBOUNCER,
+        }
+    }
+    # Реплики задаются списком host[:port] через запятую.
+    replica_hosts = os.getenv('DB_REPLICA_HOSTS', '').split(',')
+    for number, address in enumerate(filter(None, replica_hosts), start=1):
+        host, _, port = address.partition(':')
+        DATABASES[f'replica_{number}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'PORT': port or DATABASES['default']['PORT'],
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['foodgram_backend.db.ReplicaRouter']
+
+TEST_RUNNER = 'foodgram_backend.test_runner.MirrorConnectionRunner'
+
+
+if os.getenv('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('MEMCACHED_LOCATION'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         }
     }
 
+# Ответы анонимным пользователям кэшируются целиком только в общем кэше:
+# LocMem у каждого процесса свой, и запись, обработанная одним процессом,
+# не сбросила бы ответы, закэшированные другими.
+ANONYMOUS_RESPONSE_CACHE = bool(os.getenv('MEMCACHED_LOCATION'))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,6 +193,19 @@ STATIC_ROOT = '/backend_static/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Файлы, которые отдаются только через API (например, списки покупок).
+# nginx раздает их по внутреннему адресу PRIVATE_MEDIA_URL
+# в ответ на заголовок X-Accel-Redirect.
+PRIVATE_MEDIA_URL = '/private_media/'
+PRIVATE_MEDIA_ROOT = os.path.join(BASE_DIR, 'private_media')
+X_ACCEL_REDIRECT = os.getenv('X_ACCEL_REDIRECT', 'False') == 'True'
+
+# Загружаемые файлы сразу пишутся во временный файл на диске,
+# а не собираются в памяти процесса.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -123,6 +216,25 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.v1.pagination.PageLimitPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.v1.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.v1.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'api.v1.parsers.MultiPartJSONParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.v1.throttling.ScopedFixedWindowThrottle',
+    ],
+    # Частота по областям, пустое значение снимает ограничение.
+    'DEFAULT_THROTTLE_RATES': {
+        'recipe_write': os.getenv('THROTTLE_RECIPE_WRITE', '60/hour') or None,
+        'shopping_cart_download': os.getenv(
+            'THROTTLE_SHOPPING_CART_DOWNLOAD', '30/hour'
+        ) or None,
+    },
 }
 
 DJOSER = {
@@ -130,6 +242,7 @@ DJOSER = {
     "SEND_ACTIVATION_EMAIL": False,
     'HIDE_USERS': False,
     'SERIALIZERS': {
+        'user': 'api.v1.serializers.UserSerializer',
         'current_user': 'api.v1.serializers.UserSerializer',
     },
     'PERMISSIONS': {
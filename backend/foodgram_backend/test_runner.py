@@ -0,0 +1,17 @@
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+
+class MirrorConnectionRunner(DiscoverRunner):
+    """В Django 3.2 зеркало тестовой базы (TEST['MIRROR']) открывает
+    отдельное соединение и не видит данных из транзакции TestCase.
+    Здесь реплики используют соединение основной базы, как в проде
+    при нулевом отставании."""
+
+    def setup_databases(self, **kwargs):
+        old_config = super().setup_databases(**kwargs)
+        for alias in connections:
+            mirror = connections[alias].settings_dict['TEST']['MIRROR']
+            if mirror:
+                connections[alias] = connections[mirror]
+        return old_config
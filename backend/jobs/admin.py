@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'duration',
+                    'queries')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at',
+                       'locked_by', 'duration', 'db_time', 'queries',
+                       'last_error')
+
+
+admin.site.register(Job, JobAdmin)
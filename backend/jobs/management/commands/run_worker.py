@@ -0,0 +1,53 @@
+import signal
+from statistics import quantiles
+
+from django.core.management.base import BaseCommand
+
+from foodgram_backend.constants import JOB_STALE_TIMEOUT
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для запуска воркера фоновых задач.
+    """
+    help = ('Выполнение фоновых задач из очереди в пуле потоков. '
+            'По завершении выводит время выполнения по задачам: '
+            'среднее по всем запускам и p95 по последним.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Пауза между опросами пустой очереди, с.')
+        parser.add_argument('--stale-timeout', type=int,
+                            default=JOB_STALE_TIMEOUT,
+                            help='Через сколько секунд задача в статусе '
+                                 'running считается зависшей.')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и завершиться.')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            options['threads'],
+            poll_interval=options['poll_interval'],
+            stale_timeout=options['stale_timeout'],
+        )
+        signal.signal(signal.SIGINT, worker.stop)
+        signal.signal(signal.SIGTERM, worker.stop)
+        self.stdout.write(
+            f'Воркер {worker.name} запущен, потоков: {options["threads"]}.'
+        )
+        worker.run(once=options['once'])
+        for name, stats in sorted(worker.stats.items()):
+            durations = sorted(stats['durations'])
+            p95 = (
+                quantiles(durations, n=20)[-1]
+                if len(durations) > 1 else durations[0]
+            )
+            mean = stats['total_duration'] / (stats['done'] + stats['failed'])
+            self.stdout.write(
+                f'{name}: выполнено {stats["done"]}, '
+                f'ошибок {stats["failed"]}, '
+                f'среднее {mean * 1000:.1f} мс, '
+                f'p95 последних {len(durations)} {p95 * 1000:.1f} мс'
+            )
@@ -0,0 +1,65 @@
+from django.db import models
+from django.utils import timezone
+
+from foodgram_backend.constants import (
+    JOB_MAX_ATTEMPTS,
+    MAX_JOB_STATUS_LENGTH,
+    MAX_NAME_LENGTH,
+)
+
+
+class Job(models.Model):
+    """Модель фоновой задачи в очереди."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=MAX_NAME_LENGTH,
+                            verbose_name='Задача')
+    payload = models.JSONField(default=dict, blank=True,
+                               verbose_name='Параметры')
+    status = models.CharField(max_length=MAX_JOB_STATUS_LENGTH,
+                              choices=STATUS_CHOICES,
+                              default=PENDING,
+                              verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(default=0,
+                                                verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(
+        default=JOB_MAX_ATTEMPTS, verbose_name='Максимум попыток'
+    )
+    run_at = models.DateTimeField(default=timezone.now,
+                                  verbose_name='Запустить не раньше')
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name='Создана')
+    started_at = models.DateTimeField(null=True, blank=True,
+                                      verbose_name='Начата')
+    finished_at = models.DateTimeField(null=True, blank=True,
+                                       verbose_name='Завершена')
+    locked_by = models.CharField(max_length=MAX_NAME_LENGTH, blank=True,
+                                 verbose_name='Воркер')
+    duration = models.FloatField(null=True, blank=True,
+                                 verbose_name='Длительность, с')
+    db_time = models.FloatField(null=True, blank=True,
+                                verbose_name='Время БД, с')
+    queries = models.PositiveIntegerField(null=True, blank=True,
+                                          verbose_name='SQL-запросов')
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+
+_tasks = {}
+
+
+def task(name):
+    """Регистрирует функцию как фоновую задачу с именем name.
+    Функции задач размещаются в модулях tasks.py приложений
+    и принимают параметры задачи именованными аргументами."""
+
+    def decorator(func):
+        _tasks[name] = func
+        return func
+
+    return decorator
+
+
+def get_task(name):
+    return _tasks.get(name)
+
+
+def enqueue(name, payload=None, delay=0, unique=False, **fields):
+    """Ставит задачу в очередь после фиксации текущей транзакции.
+    При unique=True задача не добавляется, если такая же
+    уже ждет в очереди. Из асинхронного кода вызывается
+    через sync_to_async."""
+    if name not in _tasks:
+        raise ValueError(f'Неизвестная фоновая задача: {name}')
+    payload = payload or {}
+
+    def create():
+        if unique and Job.objects.filter(
+            name=name, payload=payload, status=Job.PENDING
+        ).exists():
+            return
+        Job.objects.create(
+            name=name,
+            payload=payload,
+            run_at=timezone.now() + timedelta(seconds=delay),
+            **fields,
+        )
+
+    transaction.on_commit(create)
@@ -0,0 +1,181 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from api.tests.utils import TEST_DATABASES
+from foodgram_backend.constants import (
+    JOB_MAX_RETRY_DELAY,
+    JOB_RETRY_DELAY,
+    JOB_STATS_WINDOW,
+)
+from jobs.models import Job
+from jobs.worker import Worker, retry_delay
+
+
+def fail():
+    raise ValueError('Сбой задачи')
+
+
+class WorkerTests(TestCase):
+    databases = TEST_DATABASES
+
+    def setUp(self):
+        self.worker = Worker(threads=1, stale_timeout=60)
+
+    def create_pending(self, run_in=0):
+        return Job.objects.create(
+            name='test', run_at=timezone.now() + timedelta(seconds=run_in)
+        )
+
+    def create_claimed(self, name='test', attempts=1):
+        return Job.objects.create(
+            name=name, status=Job.RUNNING, attempts=attempts,
+            max_attempts=3, locked_by=self.worker.name,
+            started_at=timezone.now(),
+        )
+
+    def skip_locked(self, supported):
+        return mock.patch.object(
+            connection.features, 'has_select_for_update_skip_locked',
+            supported,
+        )
+
+    def assertClaimed(self, jobs, expected):
+        self.assertEqual(
+            sorted(job.id for job in jobs), sorted(job.id for job in expected)
+        )
+        for job in jobs:
+            self.assertEqual(job.attempts, 1)
+            job.refresh_from_db()
+            self.assertEqual(
+                (job.status, job.locked_by, job.attempts),
+                (Job.RUNNING, self.worker.name, 1),
+            )
+            self.assertIsNotNone(job.started_at)
+
+    def test_claim(self):
+        ready = [self.create_pending() for _ in range(3)]
+        later = self.create_pending(run_in=60)
+        for supported in (True, False):
+            with self.subTest(skip_locked=supported):
+                Job.objects.update(status=Job.PENDING, attempts=0)
+                with self.skip_locked(supported):
+                    jobs = self.worker.claim(2)
+                    self.assertClaimed(jobs, ready[:2])
+                    self.assertClaimed(
+                        jobs + self.worker.claim(5), ready
+                    )
+                later.refresh_from_db()
+                self.assertEqual(later.status, Job.PENDING)
+
+    def test_claim_skips_job_taken_by_other_worker(self):
+        job, taken = self.create_pending(), self.create_pending()
+        # Другой воркер захватил задачу после выборки готовых.
+        ready = list(self.worker.ready_jobs())
+        Job.objects.filter(id=taken.id).update(
+            status=Job.RUNNING, locked_by='other:1'
+        )
+        with self.skip_locked(False), mock.patch.object(
+            Worker, 'ready_jobs', return_value=ready
+        ):
+            self.assertClaimed(self.worker.claim(5), [job])
+        taken.refresh_from_db()
+        self.assertEqual(taken.locked_by, 'other:1')
+
+    def perform(self, job, task=fail):
+        with mock.patch.dict('jobs.registry._tasks', {'test': task}):
+            with self.assertLogs('jobs.worker'):
+                self.worker.perform(job)
+        job.refresh_from_db()
+        return job
+
+    def test_done(self):
+        job = self.perform(self.create_claimed(), task=lambda: None)
+        self.assertEqual(job.status, Job.DONE)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNotNone(job.queries)
+
+    def test_retry_with_backoff(self):
+        for attempts in (1, 2):
+            with self.subTest(attempts=attempts):
+                started = timezone.now()
+                with mock.patch('jobs.worker.random.uniform', return_value=1):
+                    job = self.perform(self.create_claimed(attempts=attempts))
+                self.assertEqual(
+                    (job.status, job.locked_by), (Job.PENDING, '')
+                )
+                self.assertIn('Сбой задачи', job.last_error)
+                delay = (job.run_at - started).total_seconds()
+                expected = JOB_RETRY_DELAY * 2 ** (attempts - 1)
+                self.assertGreaterEqual(delay, expected)
+                self.assertLess(delay, expected + 5)
+
+    def test_retry_delay(self):
+        with mock.patch('jobs.worker.random.uniform', return_value=1):
+            self.assertEqual(
+                [retry_delay(attempt) for attempt in (1, 2, 3)],
+                [JOB_RETRY_DELAY, JOB_RETRY_DELAY * 2, JOB_RETRY_DELAY * 4],
+            )
+            self.assertEqual(retry_delay(100), JOB_MAX_RETRY_DELAY)
+        for _ in range(100):
+            self.assertTrue(
+                JOB_RETRY_DELAY / 2 <= retry_delay(1) <= JOB_RETRY_DELAY
+            )
+
+    def test_attempts_exhausted(self):
+        job = self.perform(self.create_claimed(attempts=3))
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIn('Сбой задачи', job.last_error)
+
+    def test_unknown_task(self):
+        job = self.perform(self.create_claimed(name='missing'))
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('missing', job.last_error)
+        self.assertEqual(self.worker.stats['missing']['failed'], 1)
+
+    def test_result_of_requeued_job_is_not_written(self):
+        job = self.create_claimed()
+
+        def requeued():
+            Job.objects.filter(id=job.id).update(
+                status=Job.RUNNING, locked_by='other:1'
+            )
+
+        job = self.perform(job, task=requeued)
+        self.assertEqual(
+            (job.status, job.locked_by), (Job.RUNNING, 'other:1')
+        )
+
+    def create_running(self, attempts, started_ago):
+        return Job.objects.create(
+            name='test', status=Job.RUNNING, attempts=attempts,
+            max_attempts=3, locked_by='other:1',
+            started_at=timezone.now() - timedelta(seconds=started_ago),
+        )
+
+    def test_requeue_stale(self):
+        retry = self.create_running(attempts=1, started_ago=120)
+        exhausted = self.create_running(attempts=3, started_ago=120)
+        active = self.create_running(attempts=3, started_ago=10)
+        self.worker.requeue_stale()
+        retry.refresh_from_db()
+        exhausted.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual((retry.status, retry.locked_by), (Job.PENDING, ''))
+        self.assertEqual(exhausted.status, Job.FAILED)
+        self.assertIsNotNone(exhausted.finished_at)
+        self.assertTrue(exhausted.last_error)
+        self.assertEqual(active.status, Job.RUNNING)
+
+    def test_record_keeps_recent_durations(self):
+        runs = JOB_STATS_WINDOW + 10
+        for number in range(runs):
+            self.worker.record('test', 1.0, success=number % 2 == 0)
+        stats = self.worker.stats['test']
+        self.assertEqual(stats['done'] + stats['failed'], runs)
+        self.assertEqual(stats['total_duration'], runs)
+        self.assertEqual(len(stats['durations']), JOB_STATS_WINDOW)
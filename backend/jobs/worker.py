@@ -0,0 +1,216 @@
+import logging
+import os
+import random
+import socket
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Event, Lock
+from time import perf_counter
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.metrics import collect_metrics, instrument_connections
+from foodgram_backend.constants import (
+    JOB_MAX_RETRY_DELAY,
+    JOB_RETRY_DELAY,
+    JOB_STALE_TIMEOUT,
+    JOB_STATS_WINDOW,
+)
+from jobs.models import Job
+from jobs.registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempt):
+    """Экспоненциальная задержка перед повтором со случайным разбросом,
+    чтобы упавшие одновременно задачи не повторялись одновременно."""
+    delay = min(JOB_MAX_RETRY_DELAY, JOB_RETRY_DELAY * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1)
+
+
+class Worker:
+    """Выполняет задачи из таблицы Job в пуле потоков.
+
+    Задачи забираются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+    несколько воркеров не берут одну задачу. На SQLite, где SKIP LOCKED
+    нет, задача захватывается условным UPDATE по статусу.
+    Задачи, зависшие в статусе running дольше stale_timeout
+    (например, после падения воркера), возвращаются в очередь,
+    а исчерпавшие попытки помечаются как failed.
+    """
+
+    def __init__(self, threads, poll_interval=1.0,
+                 stale_timeout=JOB_STALE_TIMEOUT):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = Event()
+        self.lock = Lock()
+        self.running = 0
+        self.stats = {}
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self, once=False):
+        """Основной цикл. При once=True выполняет задачи,
+        готовые к запуску, и завершается."""
+        with ThreadPoolExecutor(self.threads) as executor:
+            while not self.stopping.is_set():
+                self.requeue_stale()
+                with self.lock:
+                    free = self.threads - self.running
+                jobs = self.claim(free) if free else []
+                for job in jobs:
+                    with self.lock:
+                        self.running += 1
+                    executor.submit(self.execute, job)
+                if once and not jobs:
+                    with self.lock:
+                        if not self.running:
+                            break
+                if not jobs:
+                    self.stopping.wait(self.poll_interval)
+        close_old_connections()
+
+    def ready_jobs(self):
+        return Job.objects.filter(
+            status=Job.PENDING, run_at__lte=timezone.now()
+        ).order_by('run_at', 'id')
+
+    def claim(self, limit):
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                jobs = list(
+                    self.ready_jobs().select_for_update(skip_locked=True)
+                    [:limit]
+                )
+                Job.objects.filter(id__in=[job.id for job in jobs]).update(
+                    status=Job.RUNNING,
+                    started_at=timezone.now(),
+                    locked_by=self.name,
+                    attempts=F('attempts') + 1,
+                )
+        else:
+            jobs = []
+            for job in self.ready_jobs()[:limit]:
+                claimed = Job.objects.filter(
+                    id=job.id, status=Job.PENDING
+                ).update(
+                    status=Job.RUNNING,
+                    started_at=timezone.now(),
+                    locked_by=self.name,
+                    attempts=F('attempts') + 1,
+                )
+                if claimed:
+                    jobs.append(job)
+        for job in jobs:
+            job.attempts += 1
+        return jobs
+
+    def requeue_stale(self):
+        stale = Job.objects.filter(
+            status=Job.RUNNING,
+            started_at__lt=timezone.now() - timedelta(
+                seconds=self.stale_timeout
+            ),
+        )
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, finished_at=timezone.now(), locked_by='',
+            last_error='Задача зависла, попытки исчерпаны.',
+        )
+        if failed:
+            logger.error('Зависших задач без попыток: %s', failed)
+        requeued = stale.update(status=Job.PENDING, locked_by='')
+        if requeued:
+            logger.warning('В очередь возвращено зависших задач: %s', requeued)
+
+    def execute(self, job):
+        close_old_connections()
+        try:
+            self.perform(job)
+        except Exception:
+            logger.exception('Задача %s #%s: ошибка воркера', job.name, job.id)
+        finally:
+            close_old_connections()
+            with self.lock:
+                self.running -= 1
+
+    def perform(self, job):
+        func = get_task(job.name)
+        start = perf_counter()
+        error = None
+        with collect_metrics() as metrics:
+            if func is None:
+                error = f'Неизвестная фоновая задача: {job.name}'
+            else:
+                try:
+                    with instrument_connections():
+                        func(**job.payload)
+                except Exception:
+                    error = traceback.format_exc()
+        duration = perf_counter() - start
+        self.record(job.name, duration, error is None)
+        timings = {
+            'duration': duration,
+            'db_time': metrics.db_time,
+            'queries': metrics.queries,
+        }
+        if error is None:
+            fields = {
+                'status': Job.DONE, 'finished_at': timezone.now(),
+                'last_error': '',
+            }
+        elif func is not None and job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            fields = {
+                'status': Job.PENDING, 'locked_by': '', 'last_error': error,
+                'run_at': timezone.now() + timedelta(seconds=delay),
+            }
+        else:
+            fields = {
+                'status': Job.FAILED, 'finished_at': timezone.now(),
+                'last_error': error,
+            }
+        # Зависшую задачу могли вернуть в очередь и отдать другому
+        # воркеру: тогда результат этого запуска не записывается.
+        updated = Job.objects.filter(
+            id=job.id, status=Job.RUNNING, locked_by=self.name
+        ).update(**fields, **timings)
+        if not updated:
+            logger.warning(
+                'Задача %s #%s больше не закреплена за воркером %s, '
+                'результат не записан', job.name, job.id, self.name
+            )
+        elif error is None:
+            logger.info(
+                'Задача %s #%s выполнена за %.1f мс, SQL-запросов: %s',
+                job.name, job.id, duration * 1000, metrics.queries
+            )
+        elif fields['status'] == Job.PENDING:
+            logger.warning(
+                'Задача %s #%s упала (попытка %s из %s), повтор через %.0f с',
+                job.name, job.id, job.attempts, job.max_attempts, delay
+            )
+        else:
+            logger.error('Задача %s #%s завершилась ошибкой', job.name, job.id)
+
+    def record(self, name, duration, success):
+        """Статистика по задаче: число выполнений, суммарное время
+        и длительности последних JOB_STATS_WINDOW выполнений."""
+        with self.lock:
+            stats = self.stats.setdefault(name, {
+                'done': 0,
+                'failed': 0,
+                'total_duration': 0.0,
+                'durations': deque(maxlen=JOB_STATS_WINDOW),
+            })
+            stats['done' if success else 'failed'] += 1
+            stats['total_duration'] += duration
+            stats['durations'].append(duration)
@@ -1,6 +1,13 @@
+from collections import defaultdict
+from functools import partial
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
 
 from foodgram_backend.constants import MIN_RECIPE_ADMIN
+from recipes.deletion import BulkDeleter
 from recipes.models import (
     Favorites,
     Ingredient,
@@ -9,21 +16,100 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.shopping_list import refresh_recipe_shopping_lists
+
+
+class BulkDeleteAdminMixin:
+    """Удаление через BulkDeleter вместо сборщика Django: связанные
+    объекты не загружаются в память, на странице подтверждения
+    выводится только их количество по моделям.
+
+    Как и у сборщика Django, удаление запрещается, если у пользователя
+    нет права удалять объекты одной из зарегистрированных в админке
+    моделей, строки которых будут удалены."""
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        counts = BulkDeleter(self.model).count([obj.pk for obj in objs])
+        model_count = {}
+        perms_needed = set()
+        for model, count in counts.items():
+            if not count:
+                continue
+            opts = model._meta
+            model_count[opts.verbose_name_plural] = count
+            if model is self.model:
+                allowed = all(
+                    self.has_delete_permission(request, obj) for obj in objs
+                )
+            else:
+                model_admin = self.admin_site._registry.get(model)
+                allowed = (
+                    model_admin is None
+                    or model_admin.has_delete_permission(request)
+                )
+            if not allowed:
+                perms_needed.add(opts.verbose_name)
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        BulkDeleter(self.model).delete([obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        BulkDeleter(self.model).delete(queryset.values_list('pk', flat=True))
+
+
+class RecipeChangeList(ChangeList):
+    """Число добавлений в избранное считается только для рецептов
+    текущей страницы: подзапрос добавляется после пагинации и не попадает
+    в запрос COUNT(*) для всего списка."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.result_list = self.result_list.annotate(
+            favorites_total=Subquery(
+                Favorites.objects.filter(recipe=OuterRef('pk'))
+                .order_by()
+                .values('recipe')
+                .annotate(count=Count('id'))
+                .values('count')
+            )
+        )
 
 
 class RecipeIngredientsInline(admin.TabularInline):
     model = RecipeIngredients
     min_num = MIN_RECIPE_ADMIN
+    autocomplete_fields = ('ingredient',)
 
 
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(BulkDeleteAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'author', 'favorites_count')
-    list_filter = ('author', 'name', 'tags__name')
+    list_select_related = ('author',)
+    list_filter = ('tags',)
+    search_fields = ('^name', '^author__username', '^author__email')
+    show_full_result_count = False
+    autocomplete_fields = ('author',)
     inlines = [
         RecipeIngredientsInline,
     ]
 
+    def get_changelist(self, request, **kwargs):
+        return RecipeChangeList
+
+    def save_related(self, request, form, formsets, change):
+        recipe_ingredients = RecipeIngredients.objects.filter(
+            recipe=form.instance
+        ).values_list('ingredient_id', flat=True)
+        changed = set(recipe_ingredients)
+        super().save_related(request, form, formsets, change)
+        changed.update(recipe_ingredients.all())
+        if change:
+            refresh_recipe_shopping_lists(form.instance.id, changed)
+
     def favorites_count(self, obj):
+        if hasattr(obj, 'favorites_total'):
+            return obj.favorites_total or 0
         return obj.favorites.count()
 
     favorites_count.short_description = ' Добавлений рецепта в избранное'
@@ -31,12 +117,63 @@ class RecipeAdmin(admin.ModelAdmin):
 
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
-    list_filter = ('name',)
+    search_fields = ('^name',)
+    ordering = ('name',)
+    show_full_result_count = False
+
+
+class RecipeIngredientsAdmin(admin.ModelAdmin):
+    list_display = ('recipe', 'ingredient', 'amount')
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+    show_full_result_count = False
+
+    def refresh_shopping_lists(self, rows):
+        """Пересчитывает списки покупок с рецептами из пар (рецепт,
+        ингредиент) до и после изменения, когда транзакция админки
+        будет зафиксирована."""
+        ingredients = defaultdict(set)
+        for recipe_id, ingredient_id in rows:
+            ingredients[recipe_id].add(ingredient_id)
+        for recipe_id, changed in ingredients.items():
+            transaction.on_commit(
+                partial(refresh_recipe_shopping_lists, recipe_id, changed)
+            )
+
+    def save_model(self, request, obj, form, change):
+        rows = [(obj.recipe_id, obj.ingredient_id)]
+        if change:
+            rows.extend(RecipeIngredients.objects.filter(
+                pk=obj.pk
+            ).values_list('recipe_id', 'ingredient_id'))
+        super().save_model(request, obj, form, change)
+        self.refresh_shopping_lists(rows)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.refresh_shopping_lists([(obj.recipe_id, obj.ingredient_id)])
+
+    def delete_queryset(self, request, queryset):
+        rows = list(queryset.values_list('recipe_id', 'ingredient_id'))
+        super().delete_queryset(request, queryset)
+        self.refresh_shopping_lists(rows)
+
+
+class UserRecipeAdmin(admin.ModelAdmin):
+    list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('^user__username', '^recipe__name')
+    show_full_result_count = False
+
+
+class ShoppingCartAdmin(UserRecipeAdmin):
+    list_display = UserRecipeAdmin.list_display + ('quantity',)
 
 
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Tag)
-admin.site.register(RecipeIngredients)
-admin.site.register(Favorites)
-admin.site.register(ShoppingCart)
+admin.site.register(RecipeIngredients, RecipeIngredientsAdmin)
+admin.site.register(Favorites, UserRecipeAdmin)
+admin.site.register(ShoppingCart, ShoppingCartAdmin)
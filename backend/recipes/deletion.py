@@ -0,0 +1,134 @@
+from collections import OrderedDict
+
+from django.db import models, router
+from django.db.models import Q
+from django.dispatch import Signal
+
+from foodgram_backend.constants import DELETE_CHUNK_SIZE
+from recipes.models import Recipe
+from users.models import User
+
+# Отправляется после удаления каждой пачки строк вместо post_delete.
+# sender — модель, rows — словари с pk и значениями внешних ключей.
+bulk_deleted = Signal()
+
+
+class BulkDeleter:
+    """Удаляет объекты модели вместе со связанными через CASCADE
+    set-based запросами DELETE ... WHERE id IN (...) пачками
+    по chunk_size строк, начиная с зависимых таблиц.
+
+    В отличие от QuerySet.delete() объекты не загружаются в память
+    и сигналы pre_delete/post_delete не отправляются: вместо них
+    для каждой пачки отправляется bulk_deleted.
+    Удаление не выполняется одной транзакцией: при сбое остаются
+    только объекты, зависимые строки которых уже удалены.
+    """
+
+    def __init__(self, model, chunk_size=DELETE_CHUNK_SIZE, progress=None):
+        self.model = model
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.steps = self.build_plan(model, ['pk'], (model,))
+
+    def build_plan(self, model, path, chain):
+        """Шаги удаления (модель, путь до удаляемых объектов):
+        сначала зависимые модели, затем сама модель."""
+        steps = []
+        for relation in model._meta.get_fields(include_hidden=True):
+            if not (
+                relation.auto_created and not relation.concrete
+                and (relation.one_to_many or relation.one_to_one)
+            ):
+                continue
+            on_delete = relation.on_delete
+            related_model = relation.related_model
+            related_path = [relation.field.name] + path
+            if on_delete is models.DO_NOTHING:
+                continue
+            if on_delete is models.SET_NULL:
+                steps.append((related_model, related_path, relation.field))
+                continue
+            if on_delete is not models.CASCADE:
+                raise ValueError(
+                    f'{related_model._meta.label}.{relation.field.name}: '
+                    f'массовое удаление не поддерживает {on_delete.__name__}'
+                )
+            if related_model in chain:
+                raise ValueError(
+                    f'Циклическая связь {related_model._meta.label}'
+                )
+            steps.extend(self.build_plan(
+                related_model, related_path, chain + (related_model,)
+            ))
+        steps.append((model, path, None))
+        return steps
+
+    def step_queryset(self, model, path, pks):
+        manager = model._base_manager.db_manager(router.db_for_write(model))
+        return manager.filter(
+            **{'__'.join(path) + '__in': pks}
+        ).order_by()
+
+    def count(self, pks):
+        """Число строк, которые будут удалены, по моделям (dry-run)."""
+        filters = OrderedDict()
+        for model, path, null_field in self.steps:
+            if null_field is None:
+                lookup = Q(**{'__'.join(path) + '__in': pks})
+                filters[model] = filters.get(model, Q()) | lookup
+        return OrderedDict(
+            (model, model._base_manager.db_manager(
+                router.db_for_write(model)
+            ).filter(lookup).count())
+            for model, lookup in filters.items()
+        )
+
+    def delete(self, pks):
+        """Удаляет объекты с первичными ключами pks и связанные с ними.
+        Возвращает число удаленных строк по моделям."""
+        pks = list(pks)
+        deleted = OrderedDict()
+        for start in range(0, len(pks), self.chunk_size):
+            chunk = pks[start:start + self.chunk_size]
+            for model, path, null_field in self.steps:
+                queryset = self.step_queryset(model, path, chunk)
+                if null_field is not None:
+                    queryset.update(**{null_field.name: None})
+                    continue
+                count = self.delete_rows(model, queryset)
+                deleted[model] = deleted.get(model, 0) + count
+        return deleted
+
+    def delete_rows(self, model, queryset):
+        fields = ['pk'] + [
+            field.attname for field in model._meta.concrete_fields
+            if field.is_relation
+        ]
+        total = 0
+        while True:
+            rows = list(queryset.values(*fields)[:self.chunk_size])
+            if not rows:
+                return total
+            model._base_manager.filter(
+                pk__in=[row['pk'] for row in rows]
+            )._raw_delete(queryset.db)
+            bulk_deleted.send(sender=model, rows=rows)
+            total += len(rows)
+            if self.progress is not None:
+                self.progress(model, total)
+
+
+def delete_recipes(pks, **kwargs):
+    return BulkDeleter(Recipe, **kwargs).delete(pks)
+
+
+def delete_users(pks, **kwargs):
+    return BulkDeleter(User, **kwargs).delete(pks)
+
+
+def format_counts(counts):
+    return ', '.join(
+        f'{model._meta.verbose_name_plural}: {count}'
+        for model, count in counts.items() if count
+    )
@@ -0,0 +1,39 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.deletion import BulkDeleter, format_counts
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для массового удаления объектов со связанными.
+    """
+    help = ('Удаление объектов вместе со связанными через CASCADE '
+            'set-based запросами пачками. С --dry-run только считает строки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='Модель, например users.User.')
+        parser.add_argument('--ids', type=int, nargs='+', required=True)
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def report(self, model, deleted):
+        self.stdout.write(
+            f'{model._meta.label}: удалено {deleted}', ending='\r'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as error:
+            raise CommandError(error)
+        kwargs = {'progress': self.report}
+        if options['chunk_size']:
+            kwargs['chunk_size'] = options['chunk_size']
+        deleter = BulkDeleter(model, **kwargs)
+        if options['dry_run']:
+            counts = deleter.count(options['ids'])
+            self.stdout.write(f'Будет удалено: {format_counts(counts)}.')
+            return
+        counts = deleter.delete(options['ids'])
+        self.stdout.write(f'\nУдалено: {format_counts(counts)}.')
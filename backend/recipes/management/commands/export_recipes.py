@@ -0,0 +1,72 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для выгрузки рецептов в формате JSON Lines.
+    """
+    help = ('Выгрузка рецептов в файл JSON Lines: одна строка на рецепт, '
+            'тэги по слагу, ингредиенты по названию и единице измерения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл для выгрузки, - для stdout.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def iter_recipes(self, batch_size):
+        """Рецепты по возрастанию id пачками,
+        без загрузки всей таблицы в память."""
+        last_id = 0
+        while True:
+            batch = list(
+                Recipe.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .select_related('author')
+                .prefetch_related('tags', 'recipe_ingredients__ingredient')
+                [:batch_size]
+            )
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1].id
+
+    def serialize(self, recipe):
+        return {
+            'author': recipe.author.email,
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'image': recipe.image.name,
+            'pub_date': recipe.pub_date.isoformat(),
+            'tags': [tag.slug for tag in recipe.tags.all()],
+            'ingredients': [
+                {
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in recipe.recipe_ingredients.all()
+            ],
+        }
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            file = sys.stdout
+        else:
+            file = open(options['path'], 'w', encoding='utf8')
+        count = 0
+        try:
+            for recipe in self.iter_recipes(options['batch_size']):
+                file.write(
+                    json.dumps(self.serialize(recipe), ensure_ascii=False)
+                )
+                file.write('\n')
+                count += 1
+        finally:
+            if file is not sys.stdout:
+                file.close()
+        self.stderr.write(f'Выгружено рецептов: {count}.')
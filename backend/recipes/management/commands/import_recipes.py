@@ -0,0 +1,223 @@
+import json
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from api.v1.cache import bump_recipe_fragments_version
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeImportCheckpoint,
+    RecipeIngredients,
+    Tag,
+)
+from users.models import User
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для загрузки рецептов из файла JSON Lines,
+    созданного командой export_recipes.
+    """
+    help = ('Загрузка рецептов из файла JSON Lines пачками через bulk_create. '
+            'Вместе с каждой пачкой в базе сохраняется контрольная точка, '
+            'повторный запуск продолжает загрузку с нее.')
+    required_keys = (
+        'author', 'name', 'text', 'cooking_time', 'image', 'pub_date',
+        'tags', 'ingredients',
+    )
+    required_ingredient_keys = ('name', 'measurement_unit', 'amount')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать загрузку с начала файла, игнорируя контрольную точку.'
+        )
+        parser.add_argument(
+            '--default-author', default=None,
+            help='Email автора для рецептов, автора которых нет в базе.'
+        )
+
+    def read_checkpoint(self, source):
+        return RecipeImportCheckpoint.objects.filter(
+            source=source
+        ).values_list('line', flat=True).first() or 0
+
+    def write_checkpoint(self, source, line):
+        RecipeImportCheckpoint.objects.update_or_create(
+            source=source, defaults={'line': line}
+        )
+
+    def validate_row(self, number, row):
+        if not isinstance(row, dict):
+            raise CommandError(f'Строка {number}: ожидается объект JSON.')
+        missing = [key for key in self.required_keys if key not in row]
+        for item in row.get('ingredients') or ():
+            if not isinstance(item, dict):
+                raise CommandError(
+                    f'Строка {number}: ингредиент должен быть объектом JSON.'
+                )
+            missing.extend(
+                f'ingredients.{key}'
+                for key in self.required_ingredient_keys if key not in item
+            )
+        if missing:
+            raise CommandError(
+                f'Строка {number}: нет полей '
+                f'{", ".join(sorted(set(missing)))}.'
+            )
+
+    def read_batches(self, file, skip, batch_size):
+        """Пачки пар (номер строки, рецепт), начиная со строки skip + 1."""
+        lines = enumerate(islice(file, skip, None), start=skip + 1)
+        while True:
+            chunk = list(islice(lines, batch_size))
+            if not chunk:
+                return
+            batch = []
+            for number, line in chunk:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as error:
+                    raise CommandError(f'Строка {number}: {error}')
+                self.validate_row(number, row)
+                batch.append((number, row))
+            if batch:
+                yield batch
+
+    def get_authors(self, batch, default_author):
+        emails = {row['author'] for _, row in batch}
+        authors = dict(
+            User.objects.filter(email__in=emails).values_list('email', 'id')
+        )
+        for number, row in batch:
+            if row['author'] in authors:
+                continue
+            if default_author is None:
+                raise CommandError(
+                    f'Строка {number}: нет пользователя {row["author"]}.'
+                )
+            authors[row['author']] = default_author
+        return authors
+
+    def get_ingredients(self, batch):
+        """Id ингредиентов по названию и единице измерения.
+        Отсутствующие ингредиенты создаются."""
+        keys = {
+            (item['name'], item['measurement_unit'])
+            for _, row in batch for item in row['ingredients']
+        }
+        ingredients = Ingredient.objects.filter(
+            name__in={name for name, _ in keys}
+        ).values_list('name', 'measurement_unit', 'id')
+        found = {(name, unit): pk for name, unit, pk in ingredients}
+        missing = keys - set(found)
+        if not missing:
+            return found
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name, measurement_unit=unit)
+             for name, unit in missing],
+            ignore_conflicts=True,
+        )
+        return {(name, unit): pk for name, unit, pk in ingredients.all()}
+
+    def import_batch(self, batch, tags, default_author):
+        authors = self.get_authors(batch, default_author)
+        ingredients = self.get_ingredients(batch)
+        for number, row in batch:
+            unknown = set(row['tags']) - set(tags)
+            if unknown:
+                raise CommandError(
+                    f'Строка {number}: нет тэгов {", ".join(sorted(unknown))}.'
+                )
+        recipes = [
+            Recipe(
+                author_id=authors[row['author']],
+                name=row['name'],
+                text=row['text'],
+                cooking_time=row['cooking_time'],
+                image=row['image'],
+            )
+            for _, row in batch
+        ]
+        explicit_ids = not connection.features.can_return_rows_from_bulk_insert
+        if explicit_ids:
+            first_id = (
+                Recipe.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+            ) + 1
+            for offset, recipe in enumerate(recipes):
+                recipe.id = first_id + offset
+        Recipe.objects.bulk_create(recipes)
+        # auto_now_add перезаписывает дату публикации при вставке.
+        for recipe, (_, row) in zip(recipes, batch):
+            recipe.pub_date = parse_datetime(row['pub_date'])
+        Recipe.objects.bulk_update(recipes, ['pub_date'])
+        RecipeIngredients.objects.bulk_create([
+            RecipeIngredients(
+                recipe_id=recipe.id,
+                ingredient_id=ingredients[
+                    (item['name'], item['measurement_unit'])
+                ],
+                amount=item['amount'],
+            )
+            for recipe, (_, row) in zip(recipes, batch)
+            for item in row['ingredients']
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tags[slug])
+            for recipe, (_, row) in zip(recipes, batch)
+            for slug in set(row['tags'])
+        ])
+        if explicit_ids:
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Recipe]
+                ):
+                    cursor.execute(sql)
+
+    def handle(self, *args, **options):
+        source = os.path.abspath(options['path'])
+        if options['restart']:
+            RecipeImportCheckpoint.objects.filter(source=source).delete()
+        start_line = self.read_checkpoint(source)
+        default_author = None
+        if options['default_author'] is not None:
+            default_author = User.objects.filter(
+                email=options['default_author']
+            ).values_list('id', flat=True).first()
+            if default_author is None:
+                raise CommandError(
+                    f'Нет пользователя {options["default_author"]}.'
+                )
+        tags = dict(Tag.objects.values_list('slug', 'id'))
+        if start_line:
+            self.stdout.write(f'Продолжение со строки {start_line + 1}.')
+        imported = 0
+        try:
+            with open(source, encoding='utf8') as file:
+                for batch in self.read_batches(
+                    file, start_line, options['batch_size']
+                ):
+                    line = batch[-1][0]
+                    with transaction.atomic():
+                        self.import_batch(batch, tags, default_author)
+                        self.write_checkpoint(source, line)
+                    imported += len(batch)
+                    self.stdout.write(
+                        f'Загружено рецептов: {imported} (строка {line}).'
+                    )
+        finally:
+            if imported:
+                # bulk_create не отправляет сигналы, кэш сбрасывается явно.
+                bump_recipe_fragments_version()
+        RecipeImportCheckpoint.objects.filter(source=source).delete()
+        self.stdout.write(f'Загрузка завершена, рецептов: {imported}.')
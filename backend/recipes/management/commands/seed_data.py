@@ -0,0 +1,202 @@
+import random
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from PIL import Image
+
+from recipes.models import (
+    Favorites,
+    Ingredient,
+    Recipe,
+    RecipeIngredients,
+    ShoppingCart,
+    Tag,
+)
+from recipes.shopping_list import refresh_shopping_lists
+from users.models import Subscribe, User
+
+SEED_IMAGE = 'recipes/images/seed.png'
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для наполнения базы синтетическими данными.
+    """
+    help = ('Создание пользователей, рецептов, избранного, списков покупок '
+            'и подписок для нагрузочного тестирования.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Среднее число избранных рецептов '
+                                 'у пользователя.')
+        parser.add_argument('--cart', type=int, default=5,
+                            help='Среднее число рецептов в списке покупок.')
+        parser.add_argument('--subscriptions', type=int, default=5,
+                            help='Среднее число подписок у пользователя.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--password', default='benchmark-password')
+
+    def weighted(self, population, exponent=1.0):
+        """Накопленные веса по закону Ципфа:
+        первые элементы популярнее остальных."""
+        return list(accumulate(
+            1 / (rank ** exponent) for rank in range(1, len(population) + 1)
+        ))
+
+    def sample(self, population, cum_weights, count):
+        """Выборка без повторов с учетом весов."""
+        count = min(count, len(population))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.update(random.choices(
+                population, cum_weights=cum_weights, k=count - len(chosen)
+            ))
+        return chosen
+
+    def next_id(self, model):
+        return (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+    def save_seed_image(self):
+        storage = Recipe._meta.get_field('image').storage
+        if not storage.exists(SEED_IMAGE):
+            buffer = BytesIO()
+            Image.new('RGB', (64, 64), '#E26C2D').save(buffer, 'PNG')
+            storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+
+    def create_users(self, count, password, batch_size):
+        first_id = self.next_id(User)
+        password = make_password(password)
+        User.objects.bulk_create(
+            (
+                User(
+                    id=user_id,
+                    email=f'seed{user_id}@example.com',
+                    username=f'seed{user_id}',
+                    first_name='Имя',
+                    last_name='Фамилия',
+                    password=password,
+                )
+                for user_id in range(first_id, first_id + count)
+            ),
+            batch_size=batch_size,
+        )
+        return list(range(first_id, first_id + count))
+
+    def create_recipes(self, count, user_ids, batch_size):
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        random.shuffle(ingredient_ids)
+        ingredient_weights = self.weighted(ingredient_ids)
+        author_weights = self.weighted(user_ids, exponent=0.8)
+        authors = random.choices(
+            user_ids, cum_weights=author_weights, k=count
+        )
+        first_id = self.next_id(Recipe)
+        recipe_ids = list(range(first_id, first_id + count))
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    id=recipe_id,
+                    author_id=author_id,
+                    name=f'Рецепт {recipe_id}',
+                    image=SEED_IMAGE,
+                    text='Описание рецепта. ' * random.randint(5, 40),
+                    cooking_time=random.randint(5, 180),
+                )
+                for recipe_id, author_id in zip(recipe_ids, authors)
+            ),
+            batch_size=batch_size,
+        )
+        RecipeIngredients.objects.bulk_create(
+            (
+                RecipeIngredients(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=random.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in self.sample(
+                    ingredient_ids, ingredient_weights, random.randint(3, 15)
+                )
+            ),
+            batch_size=batch_size,
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in random.sample(
+                    tag_ids, random.randint(1, min(3, len(tag_ids)))
+                )
+            ),
+            batch_size=batch_size,
+        )
+        return recipe_ids
+
+    def create_relations(self, model, user_ids, targets, average,
+                         batch_size, field):
+        """Связи пользователей с популярными рецептами или авторами."""
+        weights = self.weighted(targets)
+        objects = []
+        for user_id in user_ids:
+            count = random.randint(0, average * 2)
+            for target_id in self.sample(targets, weights, count):
+                if field == 'author_id' and target_id == user_id:
+                    continue
+                objects.append(model(user_id=user_id, **{field: target_id}))
+        model.objects.bulk_create(objects, batch_size=batch_size)
+        return len(objects)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        batch_size = options['batch_size']
+        if not Ingredient.objects.exists() or not Tag.objects.exists():
+            call_command('load_csv')
+        if not Tag.objects.exists():
+            raise CommandError('Не удалось загрузить тэги.')
+        self.save_seed_image()
+        with transaction.atomic():
+            user_ids = self.create_users(
+                options['users'], options['password'], batch_size
+            )
+            recipe_ids = self.create_recipes(
+                options['recipes'], user_ids, batch_size
+            )
+            random.shuffle(recipe_ids)
+            favorites = self.create_relations(
+                Favorites, user_ids, recipe_ids, options['favorites'],
+                batch_size, 'recipe_id'
+            )
+            cart = self.create_relations(
+                ShoppingCart, user_ids, recipe_ids, options['cart'],
+                batch_size, 'recipe_id'
+            )
+            # bulk_create не отправляет сигналы, списки покупок
+            # пересчитываются пачками пользователей.
+            for start in range(0, len(user_ids), batch_size):
+                refresh_shopping_lists(user_ids[start:start + batch_size])
+            subscriptions = self.create_relations(
+                Subscribe, user_ids, user_ids, options['subscriptions'],
+                batch_size, 'author_id'
+            )
+            # Идентификаторы заданы явно, поэтому сдвигаем последовательности.
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [User, Recipe]
+                ):
+                    cursor.execute(sql)
+        self.stdout.write(
+            f'Создано: пользователей {len(user_ids)}, рецептов '
+            f'{len(recipe_ids)}, избранного {favorites}, списков покупок '
+            f'{cart}, подписок {subscriptions}.'
+        )
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_image_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=1024, unique=True, verbose_name='Файл')),
+                ('line', models.PositiveIntegerField(verbose_name='Строка')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлена')),
+            ],
+            options={
+                'verbose_name': 'Контрольная точка загрузки рецептов',
+                'verbose_name_plural': 'Контрольные точки загрузки рецептов',
+            },
+        ),
+    ]
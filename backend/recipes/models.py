@@ -1,3 +1,6 @@
+import os
+import uuid
+
 from colorfield.fields import ColorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
@@ -9,6 +12,9 @@ from foodgram_backend.constants import (
     MAX_COOKING_TIME,
     MIN_INGREDIENTS,
     MAX_INGREDIENTS,
+    MIN_CART_QUANTITY,
+    MAX_CART_QUANTITY,
+    MAX_IMPORT_SOURCE_LENGTH,
 )
 from users.models import User
 
@@ -56,6 +62,13 @@ class Ingredient(models.Model):
         return self.name
 
 
+def recipe_image_path(instance, filename):
+    """Картинки сохраняются под случайным именем: nginx отдает их
+    как неизменяемые, и имя от клиента не должно повторяться."""
+    extension = os.path.splitext(filename)[1].lower()
+    return f'recipes/images/{uuid.uuid4().hex}{extension}'
+
+
 class Recipe(models.Model):
     """Модель рецепта."""
     name = models.CharField(max_length=MAX_NAME_LENGTH,
@@ -67,7 +80,7 @@ class Recipe(models.Model):
         verbose_name='Автор публикации'
     )
     image = models.ImageField(
-        upload_to='recipes/images/', verbose_name='Картинка'
+        upload_to=recipe_image_path, verbose_name='Картинка'
     )
     text = models.TextField(verbose_name='Описание')
     ingredients = models.ManyToManyField(Ingredient,
@@ -169,8 +182,74 @@ class Favorites(BaseFavoritesShoppingCart):
 
 class ShoppingCart(BaseFavoritesShoppingCart):
     """Модель для добавления рецепта в список покупок."""
+    quantity = models.PositiveSmallIntegerField(
+        default=MIN_CART_QUANTITY,
+        verbose_name='Сколько раз приготовить',
+        validators=(
+            MinValueValidator(
+                MIN_CART_QUANTITY,
+                message='Количество не может быть '
+                        f'меньше {MIN_CART_QUANTITY}.',
+            ),
+            MaxValueValidator(
+                MAX_CART_QUANTITY,
+                message='Количество не может '
+                        f'превышать {MAX_CART_QUANTITY}.'
+            ),
+        )
+    )
 
     class Meta:
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
         default_related_name = 'shopping_cart'
+
+
+class ShoppingListItem(models.Model):
+    """Суммарное количество ингредиента в рецептах из списка покупок
+    пользователя. Строки пересчитываются при изменении списка покупок
+    и ингредиентов рецептов в нем, см. recipes.shopping_list."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент'
+    )
+    amount = models.PositiveIntegerField(verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_user_ingredient'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.ingredient}: {self.amount}'
+
+
+class RecipeImportCheckpoint(models.Model):
+    """Последняя загруженная строка файла в команде import_recipes.
+    Сохраняется в одной транзакции с пачкой рецептов, поэтому
+    после сбоя загрузка продолжается ровно с первой незагруженной строки."""
+    source = models.CharField(max_length=MAX_IMPORT_SOURCE_LENGTH,
+                              unique=True, verbose_name='Файл')
+    line = models.PositiveIntegerField(verbose_name='Строка')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Обновлена')
+
+    class Meta:
+        verbose_name = 'Контрольная точка загрузки рецептов'
+        verbose_name_plural = 'Контрольные точки загрузки рецептов'
+
+    def __str__(self):
+        return f'{self.source}: {self.line}'
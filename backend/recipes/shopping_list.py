@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models import BigIntegerField, F, Sum
+from django.db.models.functions import Cast
+
+from recipes.models import RecipeIngredients, ShoppingCart, ShoppingListItem
+from users.models import User
+
+
+def refresh_shopping_lists(users, ingredients=None):
+    """Пересчитывает строки ShoppingListItem пользователей users
+    по ингредиентам ingredients (по всем, если None) из рецептов
+    в их списках покупок с учетом количества рецепта в списке.
+    users и ingredients — списки id или подзапросы.
+
+    Затрагиваются только переданные пары пользователь-ингредиент,
+    поэтому добавление рецепта в список покупок пересчитывает лишь
+    ингредиенты этого рецепта. Строки пользователей блокируются,
+    чтобы параллельные пересчеты одного списка не пересекались."""
+    items = ShoppingListItem.objects.filter(user__in=users)
+    amounts = RecipeIngredients.objects.filter(
+        recipe__shopping_cart__user__in=users
+    )
+    if ingredients is not None:
+        items = items.filter(ingredient__in=ingredients)
+        amounts = amounts.filter(ingredient__in=ingredients)
+    amounts = amounts.order_by().values(
+        'ingredient', user=F('recipe__shopping_cart__user')
+    ).annotate(
+        # Оба столбца smallint: без приведения произведение в PostgreSQL
+        # тоже smallint и переполняется после 32767.
+        total=Sum(
+            Cast('amount', BigIntegerField())
+            * Cast('recipe__shopping_cart__quantity', BigIntegerField())
+        )
+    )
+    with transaction.atomic():
+        list(
+            User.objects.select_for_update().filter(pk__in=users)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        items.delete()
+        ShoppingListItem.objects.bulk_create([
+            ShoppingListItem(
+                user_id=row['user'],
+                ingredient_id=row['ingredient'],
+                amount=row['total'],
+            )
+            for row in amounts
+        ])
+
+
+def refresh_recipe_shopping_lists(recipe_id, ingredients):
+    """Пересчитывает списки покупок, в которых есть рецепт, после
+    изменения его ингредиентов: ingredients — id ингредиентов рецепта
+    до и после изменения."""
+    refresh_shopping_lists(
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values('user'),
+        list(ingredients),
+    )
+
+
+def set_cart_quantities(user_id, entries):
+    """Сохраняет количество у записей списка покупок пользователя
+    одним запросом и пересчитывает ингредиенты этих рецептов."""
+    with transaction.atomic():
+        ShoppingCart.objects.bulk_update(entries, ['quantity'])
+        refresh_shopping_lists(
+            [user_id],
+            RecipeIngredients.objects.filter(
+                recipe_id__in={entry.recipe_id for entry in entries}
+            ).values('ingredient'),
+        )
@@ -0,0 +1,118 @@
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+
+from api.tests.utils import (
+    TEST_DATABASES,
+    TemporaryMediaMixin,
+    create_ingredient,
+    create_recipe,
+    create_user,
+)
+from recipes.models import (
+    Favorites,
+    Recipe,
+    RecipeIngredients,
+    ShoppingCart,
+    ShoppingListItem,
+)
+
+
+class RecipeIngredientsAdminTests(TemporaryMediaMixin, TestCase):
+    databases = TEST_DATABASES
+    url = '/admin/recipes/recipeingredients/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('cook')
+        cls.flour = create_ingredient('Мука')
+        cls.sugar = create_ingredient('Сахар')
+        cls.recipe = create_recipe(cls.user, ingredients=[(cls.flour, 100)])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipe)
+        cls.row = RecipeIngredients.objects.get(recipe=cls.recipe)
+
+    def setUp(self):
+        self.client.force_login(
+            create_user('admin', is_staff=True, is_superuser=True)
+        )
+
+    def shopping_list(self):
+        return dict(ShoppingListItem.objects.filter(
+            user=self.user
+        ).values_list('ingredient__name', 'amount'))
+
+    def change(self, ingredient, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{self.url}{self.row.pk}/change/', {
+                'recipe': self.recipe.pk,
+                'ingredient': ingredient.pk,
+                'amount': amount,
+            })
+        self.assertEqual(response.status_code, 302)
+
+    def test_change_amount_refreshes_shopping_list(self):
+        self.change(self.flour, 250)
+        self.assertEqual(self.shopping_list(), {'Мука': 250})
+
+    def test_change_ingredient_refreshes_old_and_new(self):
+        self.change(self.sugar, 30)
+        self.assertEqual(self.shopping_list(), {'Сахар': 30})
+
+    def test_add_refreshes_shopping_list(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'{self.url}add/', {
+                'recipe': self.recipe.pk,
+                'ingredient': self.sugar.pk,
+                'amount': 5,
+            })
+        self.assertEqual(self.shopping_list(), {'Мука': 100, 'Сахар': 5})
+
+    def test_delete_refreshes_shopping_list(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f'{self.url}{self.row.pk}/delete/', {'post': 'yes'}
+            )
+        self.assertEqual(self.shopping_list(), {})
+
+    def test_bulk_delete_refreshes_shopping_list(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, {
+                'action': 'delete_selected',
+                '_selected_action': [self.row.pk],
+                'post': 'yes',
+            })
+        self.assertEqual(self.shopping_list(), {})
+
+
+class BulkDeleteAdminMixinTests(TemporaryMediaMixin, TestCase):
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = create_user('staff', is_staff=True)
+        cls.staff.user_permissions.set(Permission.objects.filter(
+            codename__in=('view_recipe', 'delete_recipe')
+        ))
+        cls.recipe = create_recipe(cls.staff)
+        Favorites.objects.create(user=cls.staff, recipe=cls.recipe)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        self.url = f'/admin/recipes/recipe/{self.recipe.pk}/delete/'
+
+    def test_related_model_without_permission_is_listed(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['perms_lacking'], {'Избранное'})
+        response = self.client.post(self.url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Recipe.objects.filter(pk=self.recipe.pk).exists())
+
+    def test_delete_with_permissions(self):
+        self.staff.user_permissions.add(
+            Permission.objects.get(codename='delete_favorites')
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['perms_lacking'], set())
+        response = self.client.post(self.url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Recipe.objects.filter(pk=self.recipe.pk).exists())
@@ -0,0 +1,90 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from api.tests.utils import TEST_DATABASES, create_tag, create_user
+from recipes.models import Recipe, RecipeImportCheckpoint
+
+
+def recipe_row(name, **kwargs):
+    row = {
+        'author': 'cook@example.com',
+        'name': name,
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': 'recipes/images/test.png',
+        'pub_date': '2024-01-01T10:00:00+00:00',
+        'tags': ['breakfast'],
+        'ingredients': [
+            {'name': 'Мука', 'measurement_unit': 'г', 'amount': 100},
+        ],
+    }
+    row.update(kwargs)
+    return row
+
+
+class ImportRecipesTests(TestCase):
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        create_user('cook')
+        create_tag('breakfast')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'recipes.jsonl')
+
+    def write(self, rows):
+        with open(self.path, 'w', encoding='utf8') as file:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def run_import(self):
+        call_command(
+            'import_recipes', self.path, batch_size=2, stdout=io.StringIO()
+        )
+
+    def test_import(self):
+        self.write([recipe_row(f'Рецепт {number}') for number in range(5)])
+        self.run_import()
+        self.assertEqual(Recipe.objects.count(), 5)
+        self.assertFalse(RecipeImportCheckpoint.objects.exists())
+
+    def test_resume_after_error(self):
+        rows = [recipe_row(f'Рецепт {number}') for number in range(5)]
+        broken = dict(rows[3])
+        del broken['cooking_time']
+        self.write(rows[:3] + [broken] + rows[4:])
+        with self.assertRaisesMessage(
+            CommandError, 'Строка 4: нет полей cooking_time.'
+        ):
+            self.run_import()
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(
+            RecipeImportCheckpoint.objects.get(
+                source=os.path.abspath(self.path)
+            ).line,
+            2,
+        )
+        self.write(rows)
+        self.run_import()
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('name', flat=True)),
+            [row['name'] for row in rows],
+        )
+
+    def test_missing_ingredient_key(self):
+        self.write([recipe_row('Рецепт', ingredients=[{'name': 'Мука'}])])
+        with self.assertRaisesMessage(
+            CommandError,
+            'Строка 1: нет полей ingredients.amount, '
+            'ingredients.measurement_unit.',
+        ):
+            self.run_import()
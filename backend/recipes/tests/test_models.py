@@ -0,0 +1,12 @@
+from django.test import SimpleTestCase
+
+from recipes.models import recipe_image_path
+
+
+class RecipeImagePathTests(SimpleTestCase):
+
+    def test_client_filename_is_replaced(self):
+        first = recipe_image_path(None, 'photo.JPG')
+        second = recipe_image_path(None, 'photo.JPG')
+        self.assertNotEqual(first, second)
+        self.assertRegex(first, r'^recipes/images/[0-9a-f]{32}\.jpg$')
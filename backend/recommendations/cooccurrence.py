@@ -0,0 +1,131 @@
+import math
+from array import array
+from collections import defaultdict
+
+from recommendations.similarity import np, python_top, sparse, sparse_top
+
+
+def load_interactions(sources):
+    """Добавления рецептов пользователями из sources — троек
+    (queryset, вес, последний учтенный id).
+    Возвращает id рецептов по номерам столбцов, число пользователей,
+    для каждого источника номера строк и столбцов с весом,
+    номера рецептов с новыми добавлениями и наибольшие
+    загруженные id по источникам."""
+    users = {}
+    positions = {}
+    recipe_ids = array('q')
+    matrices = []
+    new_columns = set()
+    last_ids = []
+    for queryset, weight, last_id in sources:
+        rows, cols = array('q'), array('q')
+        max_id = last_id
+        for pk, user_id, recipe_id in queryset.values_list(
+            'id', 'user_id', 'recipe_id'
+        ).order_by().iterator():
+            row = users.setdefault(user_id, len(users))
+            column = positions.get(recipe_id)
+            if column is None:
+                column = positions[recipe_id] = len(recipe_ids)
+                recipe_ids.append(recipe_id)
+            rows.append(row)
+            cols.append(column)
+            if pk > last_id:
+                new_columns.add(column)
+                max_id = max(max_id, pk)
+        matrices.append((rows, cols, weight))
+        last_ids.append(max_id)
+    return recipe_ids, len(users), matrices, new_columns, last_ids
+
+
+class SparseCoOccurrence:
+    """Совместные добавления на разреженных матрицах scipy.
+
+    B — матрица пользователи x рецепты с весом источника (для пары
+    из нескольких источников берется наибольший), совместная частота
+    рецептов — B.T @ B, оценка — косинус столбцов B, чтобы популярные
+    рецепты не попадали в соседи ко всем подряд."""
+
+    def __init__(self, users, recipes, matrices):
+        matrix = None
+        for rows, cols, weight in matrices:
+            rows = np.frombuffer(rows, dtype=np.int64)
+            cols = np.frombuffer(cols, dtype=np.int64)
+            part = sparse.csr_matrix(
+                (np.ones(len(rows)), (rows, cols)), shape=(users, recipes)
+            )
+            # Повторные добавления одного рецепта не увеличивают вес.
+            part.data[:] = weight
+            matrix = part if matrix is None else matrix.maximum(part)
+        self.matrix = matrix
+        self.transposed = matrix.T.tocsr()
+        self.norms = np.sqrt(
+            np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel()
+        )
+        self.norms[self.norms == 0] = 1
+
+    def affected(self, columns):
+        """Рецепты, оценки которых меняются после новых добавлений
+        рецептов columns: у этих рецептов меняется нормировка, поэтому
+        пересчитываются все рецепты всех пользователей, добавивших их."""
+        users = np.unique(self.transposed[sorted(columns)].indices)
+        return np.unique(self.matrix[users].indices).tolist()
+
+    def neighbors(self, columns, top, min_common):
+        counts = (self.transposed[columns] @ self.matrix).tocsr()
+        counts.data[counts.data < min_common] = 0
+        scores = counts.multiply(
+            1 / self.norms[columns][:, None]
+        ).multiply(1 / self.norms[None, :])
+        return sparse_top(scores, columns, top)
+
+
+class PythonCoOccurrence:
+    """Тот же расчет без numpy и scipy по спискам рецептов
+    пользователей и спискам пользователей рецептов."""
+
+    def __init__(self, users, recipes, matrices):
+        self.items = defaultdict(dict)
+        for rows, cols, weight in matrices:
+            for row, column in zip(rows, cols):
+                items = self.items[row]
+                items[column] = max(items.get(column, 0), weight)
+        self.postings = defaultdict(list)
+        squares = defaultdict(float)
+        for row, items in self.items.items():
+            for column, weight in items.items():
+                self.postings[column].append((row, weight))
+                squares[column] += weight ** 2
+        self.norms = {
+            column: math.sqrt(square) for column, square in squares.items()
+        }
+
+    def affected(self, columns):
+        users = {
+            row for column in columns for row, _ in self.postings[column]
+        }
+        return sorted({
+            column for row in users for column in self.items[row]
+        })
+
+    def neighbors(self, columns, top, min_common):
+        result = []
+        for column in columns:
+            counts = defaultdict(float)
+            for row, weight in self.postings[column]:
+                for other, other_weight in self.items[row].items():
+                    counts[other] += weight * other_weight
+            norm = self.norms.get(column, 1)
+            scores = {
+                other: count / (norm * self.norms[other])
+                for other, count in counts.items() if count >= min_common
+            }
+            result.extend(python_top(scores, column, top))
+        return result
+
+
+def build_cooccurrence(users, recipes, matrices):
+    if sparse is None:
+        return PythonCoOccurrence(users, recipes, matrices)
+    return SparseCoOccurrence(users, recipes, matrices)
@@ -0,0 +1,125 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from recipes.models import Favorites, ShoppingCart
+from recommendations.cooccurrence import build_cooccurrence, load_interactions
+from recommendations.models import AlsoLikedRecipe, AlsoLikedState
+from recommendations.similarity import sparse
+from recommendations.storage import replace_neighbors
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для расчета рецептов, которые тоже нравятся.
+    """
+    help = ('Расчет рецептов, которые добавляют в избранное вместе '
+            'с данным, по матрице совместных добавлений. По умолчанию '
+            'пересчитываются только рецепты, оценки которых изменились '
+            'из-за добавлений в избранное после прошлого запуска; '
+            'удаления из избранного учитывает полный пересчет (--full).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все рецепты.'
+        )
+        parser.add_argument(
+            '--with-cart', action='store_true',
+            help='Учитывать также список покупок.'
+        )
+        parser.add_argument(
+            '--cart-weight', type=float, default=0.5,
+            help='Вес рецепта в списке покупок относительно избранного.'
+        )
+        parser.add_argument(
+            '--min-common', type=float, default=2,
+            help='Наименьшая взвешенная частота совместных добавлений.'
+        )
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        params = {
+            'with_cart': options['with_cart'],
+            'cart_weight': options['cart_weight'],
+            'min_common': options['min_common'],
+        }
+        state = AlsoLikedState.objects.first() or AlsoLikedState()
+        full = options['full'] or state.pk is None or state.options != params
+        if full and not options['full']:
+            self.stdout.write(
+                'Нет прошлого расчета с теми же параметрами, '
+                'выполняется полный пересчет.'
+            )
+        sources = [(Favorites.objects.all(), 1.0, state.last_favorite_id)]
+        if options['with_cart']:
+            sources.append((
+                ShoppingCart.objects.all(), options['cart_weight'],
+                state.last_cart_id,
+            ))
+        # Без новых добавлений записи не загружаются: загрузка читает
+        # все избранное, хотя и потоком, без создания моделей.
+        if not full and not any(
+            queryset.filter(id__gt=last_id).exists()
+            for queryset, _, last_id in sources
+        ):
+            self.stdout.write('Новых добавлений нет.')
+            return
+        recipe_ids, users, matrices, new_columns, last_ids = load_interactions(
+            sources
+        )
+        if not full and not new_columns:
+            self.stdout.write('Новых добавлений нет.')
+            return
+        count = len(recipe_ids)
+        index = build_cooccurrence(users, count, matrices)
+        columns = list(range(count)) if full else index.affected(new_columns)
+        self.stdout.write(
+            f'Пользователей: {users}, рецептов: {count}, '
+            f'к пересчету: {len(columns)}, '
+            f'расчет: {"scipy" if sparse is not None else "Python"}, '
+            f'подготовка {perf_counter() - started:.1f} с.'
+        )
+        saved = 0
+        chunk_size = options['chunk_size']
+        for start in range(0, len(columns), chunk_size):
+            chunk = columns[start:start + chunk_size]
+            neighbors = index.neighbors(
+                chunk, options['top'], options['min_common']
+            )
+            replace_neighbors(
+                AlsoLikedRecipe,
+                [recipe_ids[column] for column in chunk],
+                [
+                    (recipe_ids[row], recipe_ids[column], score)
+                    for row, column, score in neighbors
+                ],
+                options['batch_size'],
+            )
+            saved += len(neighbors)
+            self.stdout.write(
+                f'Обработано рецептов: {start + len(chunk)} '
+                f'из {len(columns)}, пар: {saved}.'
+            )
+        if full:
+            # Рецепты, которых больше нет ни в чьем избранном.
+            stale = ~Exists(
+                Favorites.objects.filter(recipe=OuterRef('recipe'))
+            )
+            if options['with_cart']:
+                stale &= ~Exists(
+                    ShoppingCart.objects.filter(recipe=OuterRef('recipe'))
+                )
+            AlsoLikedRecipe.objects.filter(stale).delete()
+        state.last_favorite_id = last_ids[0]
+        state.last_cart_id = last_ids[1] if options['with_cart'] else 0
+        state.options = params
+        state.save()
+        self.stdout.write(
+            f'Готово за {perf_counter() - started:.1f} с, '
+            f'рецептов: {len(columns)}, пар: {saved}.'
+        )
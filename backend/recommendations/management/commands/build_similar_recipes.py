@@ -0,0 +1,88 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from recommendations.models import SimilarRecipe
+from recommendations.similarity import (
+    build_index,
+    compute_neighbors,
+    load_features,
+    set_index,
+    sparse,
+)
+from recommendations.storage import replace_neighbors
+
+
+class Command(BaseCommand):
+    """
+    Django-команда для расчета похожих рецептов.
+    """
+    help = ('Расчет похожих рецептов по косинусной близости векторов '
+            'ингредиентов и тэгов с весами IDF. Рецепты обрабатываются '
+            'пачками в пуле процессов, соседи каждой пачки заменяются '
+            'в таблице одной транзакцией.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument(
+            '--tag-weight', type=float, default=0.5,
+            help='Вес совпадения тэга относительно ингредиента.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        recipe_ids, rows, cols, scale = load_features(options['tag_weight'])
+        count = len(recipe_ids)
+        index = build_index(count, rows, cols, scale)
+        self.stdout.write(
+            f'Рецептов: {count}, признаков: {len(scale)}, '
+            f'расчет: {"scipy" if sparse is not None else "Python"}, '
+            f'подготовка {perf_counter() - started:.1f} с.'
+        )
+        chunks = [
+            (start, min(start + options['chunk_size'], count))
+            for start in range(0, count, options['chunk_size'])
+        ]
+        compute = partial(compute_neighbors, top=options['top'])
+        executor = None
+        if options['workers'] > 1 and len(chunks) > 1:
+            # Процессы пула не работают с БД, открытые соединения
+            # не должны переходить в них.
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                options['workers'], initializer=set_index, initargs=(index,)
+            )
+            results = executor.map(compute, *zip(*chunks))
+        else:
+            set_index(index)
+            results = (compute(start, stop) for start, stop in chunks)
+        saved = 0
+        try:
+            for (start, stop), neighbors in zip(chunks, results):
+                replace_neighbors(
+                    SimilarRecipe,
+                    recipe_ids[start:stop],
+                    [
+                        (recipe_ids[row], recipe_ids[column], score)
+                        for row, column, score in neighbors
+                    ],
+                    options['batch_size'],
+                )
+                saved += len(neighbors)
+                self.stdout.write(
+                    f'Обработано рецептов: {stop} из {count}, '
+                    f'пар: {saved}.'
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self.stdout.write(
+            f'Готово за {perf_counter() - started:.1f} с, пар: {saved}.'
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_shoppingcart_quantity'),
+        ('recommendations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlsoLikedState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_favorite_id', models.BigIntegerField(default=0)),
+                ('last_cart_id', models.BigIntegerField(default=0)),
+                ('options', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Состояние расчета «тоже нравится»',
+                'verbose_name_plural': 'Состояние расчета «тоже нравится»',
+            },
+        ),
+        migrations.CreateModel(
+            name='AlsoLikedRecipe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Нормированная частота')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='also_liked_recipes', to='recipes.recipe', verbose_name='Рецепт')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.recipe', verbose_name='Рецепт, который тоже нравится')),
+            ],
+            options={
+                'verbose_name': 'Рецепт, который тоже нравится',
+                'verbose_name_plural': 'Рецепты, которые тоже нравятся',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='alsolikedrecipe',
+            constraint=models.UniqueConstraint(fields=('recipe', 'similar'), name='unique_also_liked_recipe'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+from django.db import models
+
+from recipes.models import Recipe
+
+
+class SimilarRecipe(models.Model):
+    """Рецепт, похожий на данный по ингредиентам и тэгам.
+    Таблица заполняется командой build_similar_recipes."""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Косинусная близость')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} ~ {self.similar}: {self.score:.3f}'
+
+
+class AlsoLikedRecipe(models.Model):
+    """Рецепт, который часто добавляют в избранное вместе с данным.
+    Таблица заполняется командой build_also_liked."""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='also_liked_recipes',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рецепт, который тоже нравится'
+    )
+    score = models.FloatField(verbose_name='Нормированная частота')
+
+    class Meta:
+        verbose_name = 'Рецепт, который тоже нравится'
+        verbose_name_plural = 'Рецепты, которые тоже нравятся'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_also_liked_recipe'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} + {self.similar}: {self.score:.3f}'
+
+
+class AlsoLikedState(models.Model):
+    """Последние учтенные записи избранного и списка покупок
+    и параметры расчета: с них начинается следующий
+    инкрементальный запуск build_also_liked."""
+    last_favorite_id = models.BigIntegerField(default=0)
+    last_cart_id = models.BigIntegerField(default=0)
+    options = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Состояние расчета «тоже нравится»'
+        verbose_name_plural = 'Состояние расчета «тоже нравится»'
@@ -0,0 +1,160 @@
+import heapq
+import math
+from array import array
+from collections import defaultdict
+from operator import itemgetter
+
+from recipes.models import Recipe, RecipeIngredients
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+# Индекс текущего процесса пула, задается в set_index.
+_index = None
+
+
+def load_features(tag_weight):
+    """Признаки рецептов: ингредиенты и тэги.
+    Возвращает id рецептов по номерам строк, номера строк и столбцов
+    ненулевых элементов и множитель веса каждого столбца."""
+    recipe_ids = array(
+        'q', Recipe.objects.order_by('id').values_list('id', flat=True)
+    )
+    positions = {pk: row for row, pk in enumerate(recipe_ids)}
+    rows, cols = array('q'), array('q')
+    columns = {}
+    scale = []
+    sources = (
+        (RecipeIngredients.objects.values_list('recipe_id', 'ingredient_id'),
+         'ingredient', 1.0),
+        (Recipe.tags.through.objects.values_list('recipe_id', 'tag_id'),
+         'tag', tag_weight),
+    )
+    for queryset, kind, weight in sources:
+        for recipe_id, feature_id in queryset.order_by().iterator():
+            row = positions.get(recipe_id)
+            if row is None:
+                continue
+            column = columns.get((kind, feature_id))
+            if column is None:
+                column = columns[(kind, feature_id)] = len(scale)
+                scale.append(weight)
+            rows.append(row)
+            cols.append(column)
+    return recipe_ids, rows, cols, scale
+
+
+def idf(count, frequency):
+    """Редкие ингредиенты весят больше, чем соль и вода."""
+    return math.log((1 + count) / (1 + frequency)) + 1
+
+
+class SparseSimilarity:
+    """Косинусная близость на разреженных матрицах scipy:
+    строки матрицы — рецепты, нормированные по длине."""
+
+    def __init__(self, count, rows, cols, scale):
+        rows = np.frombuffer(rows, dtype=np.int64)
+        cols = np.frombuffer(cols, dtype=np.int64)
+        frequency = np.bincount(cols, minlength=len(scale))
+        weights = np.asarray(scale) * (
+            np.log((1 + count) / (1 + frequency)) + 1
+        )
+        matrix = sparse.csr_matrix(
+            (weights[cols], (rows, cols)), shape=(count, len(scale))
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)))
+        norms[norms == 0] = 1
+        self.matrix = sparse.csr_matrix(matrix.multiply(1 / norms))
+        self.transposed = self.matrix.T.tocsr()
+
+    def neighbors(self, start, stop, top):
+        scores = self.matrix[start:stop] @ self.transposed
+        return sparse_top(scores, range(start, stop), top)
+
+
+class PythonSimilarity:
+    """Тот же расчет без numpy и scipy: для каждого рецепта близость
+    набирается по спискам рецептов с общими признаками."""
+
+    def __init__(self, count, rows, cols, scale):
+        frequency = defaultdict(int)
+        for column in cols:
+            frequency[column] += 1
+        features = [[] for _ in range(count)]
+        for row, column in zip(rows, cols):
+            features[row].append(
+                (column, scale[column] * idf(count, frequency[column]))
+            )
+        self.features = []
+        self.postings = defaultdict(list)
+        for row, items in enumerate(features):
+            norm = math.sqrt(sum(weight ** 2 for _, weight in items)) or 1
+            items = [(column, weight / norm) for column, weight in items]
+            self.features.append(items)
+            for column, weight in items:
+                self.postings[column].append((row, weight))
+
+    def neighbors(self, start, stop, top):
+        result = []
+        for row in range(start, stop):
+            scores = defaultdict(float)
+            for column, weight in self.features[row]:
+                for other, other_weight in self.postings[column]:
+                    scores[other] += weight * other_weight
+            result.extend(python_top(scores, row, top))
+        return result
+
+
+def sparse_top(scores, rows, top):
+    """Лучшие top столбцов каждой строки разреженной матрицы scores
+    без самого рецепта: rows — номера рецептов строк.
+    Возвращает тройки (рецепт, сосед, значение)."""
+    scores = scores.tocsr()
+    result = []
+    for offset, row in enumerate(rows):
+        begin, end = scores.indptr[offset], scores.indptr[offset + 1]
+        columns = scores.indices[begin:end]
+        values = scores.data[begin:end]
+        keep = (columns != row) & (values > 0)
+        columns, values = columns[keep], values[keep]
+        if len(values) > top:
+            best = np.argpartition(-values, top)[:top]
+            columns, values = columns[best], values[best]
+        result.extend(
+            (row, int(column), float(value))
+            for column, value in zip(columns, values)
+        )
+    return result
+
+
+def python_top(scores, row, top):
+    """То же для словаря {сосед: значение} одного рецепта."""
+    scores.pop(row, None)
+    return [
+        (row, other, score)
+        for other, score in heapq.nlargest(
+            top, scores.items(), key=itemgetter(1)
+        )
+        if score > 0
+    ]
+
+
+def build_index(count, rows, cols, scale):
+    if sparse is None:
+        return PythonSimilarity(count, rows, cols, scale)
+    return SparseSimilarity(count, rows, cols, scale)
+
+
+def set_index(index):
+    """Инициализатор процесса пула: индекс передается один раз
+    на процесс, а не с каждой пачкой."""
+    global _index
+    _index = index
+
+
+def compute_neighbors(start, stop, top):
+    return _index.neighbors(start, stop, top)
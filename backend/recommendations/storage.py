@@ -0,0 +1,25 @@
+from django.db import transaction
+
+from recipes.models import Recipe
+
+
+def replace_neighbors(model, recipe_ids, neighbors, batch_size):
+    """Заменяет соседей рецептов recipe_ids в таблице model одной
+    транзакцией. neighbors — тройки (id рецепта, id соседа, оценка);
+    рецепты, удаленные во время расчета, пропускаются."""
+    existing = set(
+        Recipe.objects.filter(
+            id__in={recipe for recipe, _, _ in neighbors}
+            | {similar for _, similar, _ in neighbors}
+        ).order_by().values_list('id', flat=True)
+    )
+    with transaction.atomic():
+        model.objects.filter(recipe_id__in=recipe_ids).delete()
+        model.objects.bulk_create(
+            [
+                model(recipe_id=recipe, similar_id=similar, score=score)
+                for recipe, similar, score in neighbors
+                if recipe in existing and similar in existing
+            ],
+            batch_size=batch_size,
+        )
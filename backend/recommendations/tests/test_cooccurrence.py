@@ -0,0 +1,129 @@
+from array import array
+from io import StringIO
+from unittest import mock, skipIf
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from api.tests.utils import (
+    TEST_DATABASES,
+    TemporaryMediaMixin,
+    create_recipe,
+    create_user,
+)
+from recipes.models import Favorites, ShoppingCart
+from recommendations.cooccurrence import (
+    PythonCoOccurrence,
+    SparseCoOccurrence,
+)
+from recommendations.models import AlsoLikedRecipe
+from recommendations.similarity import sparse
+
+# Номера рецептов по номерам пользователей: избранное и список покупок.
+FAVORITES = (
+    (0, 1, 2),
+    (0, 1),
+    (1, 2, 3),
+    (0, 3),
+    (4,),
+    (0, 1, 3),
+)
+CART = (
+    (2,),
+    (3,),
+    (),
+    (1, 2),
+    (),
+    (0, 4),
+)
+RECIPES = 6
+
+
+def as_matrix(items, weight):
+    rows, cols = array('q'), array('q')
+    for row, columns in enumerate(items):
+        rows.extend([row] * len(columns))
+        cols.extend(columns)
+    return rows, cols, weight
+
+
+@skipIf(sparse is None, 'Нужны numpy и scipy.')
+class CoOccurrenceBackendsTests(SimpleTestCase):
+    """Расчет на scipy и на чистом Python дает одних соседей
+    с одинаковыми оценками и одинаковые рецепты к пересчету."""
+
+    def build(self, backend):
+        return backend(len(FAVORITES), RECIPES, [
+            as_matrix(FAVORITES, 1.0), as_matrix(CART, 0.5),
+        ])
+
+    def neighbors(self, backend, top, min_common):
+        return {
+            (column, other): score
+            for column, other, score in self.build(backend).neighbors(
+                list(range(RECIPES)), top, min_common
+            )
+        }
+
+    def test_neighbors_agree(self):
+        for top, min_common in ((RECIPES, 0.5), (RECIPES, 2), (1, 1)):
+            with self.subTest(top=top, min_common=min_common):
+                expected = self.neighbors(PythonCoOccurrence, top, min_common)
+                actual = self.neighbors(SparseCoOccurrence, top, min_common)
+                self.assertTrue(expected)
+                self.assertEqual(actual.keys(), expected.keys())
+                for pair, score in expected.items():
+                    self.assertAlmostEqual(actual[pair], score)
+
+    def test_affected_agree(self):
+        for columns in ({4}, {3}, {0, 4}):
+            with self.subTest(columns=columns):
+                self.assertEqual(
+                    self.build(SparseCoOccurrence).affected(columns),
+                    self.build(PythonCoOccurrence).affected(columns),
+                )
+
+
+class BuildAlsoLikedTests(TemporaryMediaMixin, TestCase):
+    databases = TEST_DATABASES
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.recipes = [create_recipe(author) for _ in range(3)]
+        cls.users = [create_user(f'user{number}') for number in range(3)]
+        for user in cls.users:
+            for recipe in cls.recipes[:2]:
+                Favorites.objects.create(user=user, recipe=recipe)
+
+    def build(self, *args):
+        call_command(
+            'build_also_liked', '--min-common=1', *args, stdout=StringIO()
+        )
+        return set(AlsoLikedRecipe.objects.values_list(
+            'recipe_id', 'similar_id'
+        ))
+
+    def test_incremental_run(self):
+        first, second, third = (recipe.id for recipe in self.recipes)
+        self.assertEqual(self.build(), {(first, second), (second, first)})
+        with mock.patch(
+            'recommendations.management.commands.build_also_liked.'
+            'load_interactions'
+        ) as load:
+            self.build()
+        load.assert_not_called()
+        Favorites.objects.create(user=self.users[0], recipe=self.recipes[2])
+        self.assertEqual(self.build(), {
+            (first, second), (second, first),
+            (first, third), (third, first),
+            (second, third), (third, second),
+        })
+
+    def test_with_cart(self):
+        self.build()
+        ShoppingCart.objects.create(user=self.users[1], recipe=self.recipes[2])
+        self.assertIn(
+            (self.recipes[1].id, self.recipes[2].id),
+            self.build('--with-cart', '--cart-weight=1'),
+        )
@@ -0,0 +1,69 @@
+from array import array
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+
+from recommendations.similarity import (
+    PythonSimilarity,
+    SparseSimilarity,
+    sparse,
+)
+
+# Признаки рецептов: номера столбцов по номерам строк.
+# Столбцы 0-3 — ингредиенты, 4-5 — тэги с половинным весом.
+FEATURES = (
+    (0, 1, 4),
+    (0, 1, 2, 4),
+    (1, 2, 5),
+    (3, 5),
+    (),
+    (0, 3, 4, 5),
+)
+SCALE = [1.0, 1.0, 1.0, 1.0, 0.5, 0.5]
+
+
+@skipIf(sparse is None, 'Нужны numpy и scipy.')
+class SimilarityBackendsTests(SimpleTestCase):
+    """Расчет на scipy и на чистом Python дает одних соседей
+    с одинаковыми оценками."""
+
+    def build(self, backend):
+        rows, cols = array('q'), array('q')
+        for row, columns in enumerate(FEATURES):
+            rows.extend([row] * len(columns))
+            cols.extend(columns)
+        return backend(len(FEATURES), rows, cols, SCALE)
+
+    def neighbors(self, backend, top):
+        return {
+            (row, other): score
+            for row, other, score in self.build(backend).neighbors(
+                0, len(FEATURES), top
+            )
+        }
+
+    def test_backends_agree(self):
+        for top in (1, 2, len(FEATURES)):
+            with self.subTest(top=top):
+                expected = self.neighbors(PythonSimilarity, top)
+                actual = self.neighbors(SparseSimilarity, top)
+                self.assertEqual(actual.keys(), expected.keys())
+                for pair, score in expected.items():
+                    self.assertAlmostEqual(actual[pair], score)
+
+    def test_neighbors(self):
+        neighbors = self.neighbors(PythonSimilarity, len(FEATURES))
+        # Рецепт без признаков ни на что не похож, рецепт не сосед себе.
+        self.assertFalse(
+            [pair for pair in neighbors if 4 in pair or pair[0] == pair[1]]
+        )
+        self.assertEqual(
+            max(
+                (pair for pair in neighbors if pair[0] == 0),
+                key=neighbors.get,
+            ),
+            (0, 1),
+        )
+        for (row, other), score in neighbors.items():
+            self.assertAlmostEqual(score, neighbors[other, row])
+            self.assertTrue(0 < score <= 1)
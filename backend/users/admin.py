@@ -3,16 +3,27 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
 from rest_framework.authtoken.models import TokenProxy
 
+from recipes.admin import BulkDeleteAdminMixin
 from users.models import Subscribe, User
 
 
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(BulkDeleteAdminMixin, BaseUserAdmin):
 
     list_display = ('email', 'username')
-    list_filter = ('email', 'username')
+    list_filter = ('is_staff', 'is_active')
+    search_fields = ('^email', '^username')
+    show_full_result_count = False
+
+
+class SubscribeAdmin(admin.ModelAdmin):
+    list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('^user__username', '^author__username')
+    show_full_result_count = False
 
 
 admin.site.register(User, UserAdmin)
-admin.site.register(Subscribe)
+admin.site.register(Subscribe, SubscribeAdmin)
 admin.site.unregister(Group)
 admin.site.unregister(TokenProxy)